@@ -1,36 +1,246 @@
 # -*- coding: utf-8 -*-
-import re
+import os
 import numpy as np
-import matplotlib.pyplot as plt
 from collections import defaultdict
-from sklearn.feature_extraction.text import TfidfVectorizer
-from textblob import TextBlob
+
+from sentiment_cache import PolarityCache, normalize_text
+from sentiment_keywords import HashedTfidf, IncrementalTfidf
+from sentiment_lexicon import LexiconScorer, SentimentLexicon
+from sentiment_metrics import WindowedMetrics
+from sentiment_profile import Profiler, prometheus_text
+from sentiment_render import ChartRenderer
+from sentiment_retention import TextRetention
+from sentiment_segment import CJK_RE, ChineseSegmenter
+from sentiment_snapshot import load_snapshot, release_snapshot, write_snapshot
+from sentiment_state import POLARITY_BINS, AnalyzerState, polarity_bin, polarity_bins
+from sentiment_tokens import Tokenizer
 
 
 class SentimentAnalyzer:
-    def __init__(self):
-        """初始化分析器，加载情感词典"""
+    def __init__(self, max_texts=10000, max_age=None, max_bytes=None, workers=None, chunksize=500,
+                 cache_size=100000, cache_path=None, lexicon_paths=(), engine='textblob',
+                 render_every=None, render_interval=None, render_background=False,
+                 chart_path='sentiment_analysis.png', metrics_resolution=1.0, metrics_buckets=3600,
+                 keywords_k=5, hash_features=None, profile=False, token_cache_size=4096,
+                 segment_dict_paths=()):
+        """初始化分析器，加载情感词典
+
+        max_texts/max_age/max_bytes 为历史文本的保留策略（条数/秒/字节），
+        被淘汰的文本同时从关键词统计中移除。
+        workers 不为 None 时，analyze_many 使用该数量的进程并行打分，每块 chunksize 条。
+        cache_size 为极性缓存的容量（0 表示不缓存）；给出 cache_path 时启动时从该文件
+        恢复缓存，close() 时写回。
+        lexicon_paths 为额外加载的情感词典文件（格式见 SentimentLexicon.load）。
+        engine 为打分引擎：'textblob'（默认，较准确）或 'lexicon'（按情感词典向量化打分，
+        速度快得多；此时不使用进程池和极性缓存）。
+        render_every/render_interval 控制 analyze_and_visualize 每多少条/多少秒重画一次图表，
+        只给出其中一个时只按它节流，两个都不给时每条都重画；
+        render_background 为 True 时在后台线程画图写文件。
+        metrics_resolution/metrics_buckets 为时间窗口统计的桶时长（秒）和桶数，
+        默认保留最近一小时、精确到秒。
+        keywords_k 为每条文本提取的关键词个数。
+        hash_features 不为 None 时，关键词统计使用该宽度的哈希特征空间（如 2**20），
+        内存固定，不再保存完整词表。
+        profile 为 True 时记录各阶段的耗时（见 profile_report/prometheus_metrics），
+        也可以之后设置 analyzer.profiler.enabled。
+        token_cache_size 为分词结果缓存的条数：同一条文本的打分、关键词统计和关键词提取
+        共用一次分词，批量分析后再逐条提取关键词时应不小于每批的条数。
+        含中文的文本用内置词典分词，情感词典中的中文词也会加入分词词典；
+        segment_dict_paths 为额外的分词词典文件（格式见 ChineseSegmenter.load）。
+        """
+        if engine not in ('textblob', 'lexicon'):
+            raise ValueError(f'未知的打分引擎: {engine}')
+        self.engine = engine
+        self.profiler = Profiler(enabled=profile)
         self.sentiment_words = self._load_sentiment_words()
+        # 所有情感词放进同一个哈希索引，查词与词典大小无关
+        self.lexicon = SentimentLexicon.from_words(self.sentiment_words)
+        for path in lexicon_paths:
+            self.lexicon.load(path)
+        self.segmenter = ChineseSegmenter.default()
+        for path in segment_dict_paths:
+            self.segmenter.load(path)
+        self._segment_lexicon_words()
+        self.tokenizer = Tokenizer(ngram_range=(1, 2), stop_words='english', maxsize=token_cache_size,
+                                   segmenter=self.segmenter)
+        self.lexicon_scorer = LexiconScorer(self.lexicon, tokenizer=self.tokenizer)
+        self._polarity_analyzer = None
+        self.cache = PolarityCache(maxsize=cache_size) if cache_size else None
+        self.cache_path = cache_path
+        if self.cache is not None and cache_path and os.path.exists(cache_path):
+            self.cache.load(cache_path)
         self.history = {'positive': 0, 'negative': 0, 'neutral': 0}
-        self.tfidf = TfidfVectorizer(ngram_range=(1, 2), stop_words='english')
-        self.all_texts = []
+        self.polarity_hist = np.zeros(POLARITY_BINS, dtype=np.int64)
+        self.metrics = WindowedMetrics(resolution=metrics_resolution, buckets=metrics_buckets)
+        if hash_features is None:
+            self.tfidf = IncrementalTfidf(ngram_range=(1, 2), stop_words='english', tokenizer=self.tokenizer)
+        else:
+            self.tfidf = HashedTfidf(ngram_range=(1, 2), stop_words='english', n_features=hash_features,
+                                     tokenizer=self.tokenizer)
+        self.corpus = TextRetention(max_texts=max_texts, max_age=max_age, max_bytes=max_bytes,
+                                    on_evict=self._forget_text)
+        # 从快照恢复时映射的快照文件（见 restore/release_snapshot）
+        self.mapped_snapshot = None
+        self.keywords_k = keywords_k
+        self.workers = workers
+        self.chunksize = chunksize
+        self.scorer = None
+        if render_every is None and render_interval is None:
+            render_every = 1
+        self.renderer = ChartRenderer(path=chart_path, every=render_every, interval=render_interval,
+                                      background=render_background)
+
+    @property
+    def all_texts(self):
+        """当前保留的历史文本"""
+        return list(self.corpus)
+
+    def _forget_text(self, text, tf):
+        """文本被淘汰时，同步移除它的文档频率"""
+        self.tfidf.remove_document(tf)
+
+    def close(self):
+        """关闭并行打分的进程池，画出最后的图表，并保存极性缓存"""
+        self.renderer.flush(self.history)
+        self.renderer.close()
+        if self.scorer is not None:
+            self.scorer.close()
+            self.scorer = None
+        if self.cache is not None and self.cache_path:
+            self.cache.save(self.cache_path)
+
+    def _segment_lexicon_words(self):
+        """把词典中的中文情感词加入分词词典：情感词要能整词切出来，才能在词典中命中"""
+        for word in self.lexicon.ids:
+            if CJK_RE.search(word) and word not in self.segmenter:
+                self.segmenter.add(word)
+
+    def load_lexicon(self, path, category=None):
+        """加载情感词典文件（格式见 SentimentLexicon.load），新的中文词同时加入分词词典，返回加载的条数
+
+        请用它代替直接调用 lexicon.load()，否则新的中文情感词不一定能整词切出来。
+        """
+        count = self.lexicon.load(path, category=category)
+        self._segment_lexicon_words()
+        # 缓存的分词结果和工作进程中的分词器都是按旧词典切的
+        self.tokenizer.clear()
+        if self.scorer is not None:
+            self.scorer.close()
+            self.scorer = None
+        return count
+
+    def _polarity(self, text):
+        """计算极性分数，相同的规范化文本直接从缓存取"""
+        if self.engine == 'lexicon':
+            return float(self.lexicon_scorer.score_words([self.tokenizer(text).words])[0])
+        if self.cache is None:
+            return self.polarity_analyzer.analyze(text).polarity
+        key = normalize_text(text)
+        polarity = self.cache.get(key)
+        if polarity is None:
+            polarity = self.polarity_analyzer.analyze(text).polarity
+            self.cache.put(key, polarity)
+        return polarity
+
+    @property
+    def polarity_analyzer(self):
+        """TextBlob默认的情感分析器，第一次打分时才导入 TextBlob/NLTK
+
+        复用同一个实例，避免每条文本都构造TextBlob。
+        """
+        if self._polarity_analyzer is None:
+            from textblob.en.sentiments import PatternAnalyzer
+            self._polarity_analyzer = PatternAnalyzer()
+        return self._polarity_analyzer
+
+    def profile_report(self):
+        """各阶段的调用次数、总/平均/最大耗时、处理条数，以及缓存命中情况"""
+        report = {'stages': self.profiler.report()}
+        if self.cache is not None:
+            report['cache'] = self.cache.stats()
+        return report
+
+    def prometheus_metrics(self):
+        """Prometheus 文本格式的各阶段耗时、缓存命中和情感计数"""
+        counters = {'texts': dict(self.history)}
+        if self.cache is not None:
+            counters['cache'] = {'hits': self.cache.hits, 'misses': self.cache.misses}
+        return prometheus_text(self.profiler.report(), counters)
+
+    def window_stats(self, seconds):
+        """最近 seconds 秒内的条数、各类别计数、平均极性和极性百分位数"""
+        return self.metrics.query(seconds)
+
+    def get_state(self):
+        """导出可合并、可序列化的统计状态（AnalyzerState）"""
+        return AnalyzerState(self.history, self.tfidf.document_frequencies(), self.tfidf.n_docs,
+                             self.polarity_hist)
+
+    def merge_state(self, state):
+        """把其他分片的统计状态合并进来，之后的关键词打分使用合并后的文档频率"""
+        for sentiment, count in state.history.items():
+            self.history[sentiment] = self.history.get(sentiment, 0) + count
+        self.tfidf.merge(state.df, state.n_docs)
+        self.polarity_hist += state.polarity_hist
+
+    def snapshot(self, path):
+        """把统计、词表和保留的文本写成二进制快照文件
+
+        不能写到当前正在映射的快照文件上：请写到新的路径，或先调用 release_snapshot()。
+        """
+        write_snapshot(self, path)
+
+    @classmethod
+    def restore(cls, path, **kwargs):
+        """从快照文件恢复分析器（其余参数同构造函数）
+
+        快照以只读方式内存映射，词表不需要重新载入，多个进程可以共享同一份页面。
+        映射的快照在 mapped_snapshot 中，一直保持映射，直到调用 release_snapshot()。
+        """
+        analyzer = cls(**kwargs)
+        analyzer.mapped_snapshot = load_snapshot(analyzer, path)
+        return analyzer
+
+    def release_snapshot(self):
+        """把映射的快照数据复制到内存中并关闭快照文件（没有映射时什么也不做）"""
+        release_snapshot(self)
+
+    def memory_usage(self):
+        """当前保留文本和关键词统计占用的内存（字节为估算值）"""
+        texts = self.corpus.memory_usage()
+        vocabulary = self.tfidf.memory_usage()
+        return {
+            'texts': texts['texts'],
+            'evicted': texts['evicted'],
+            'vocabulary': vocabulary['vocabulary'],
+            'bytes': texts['bytes'] + vocabulary['bytes'],
+        }
 
     def _load_sentiment_words(self):
         """加载基础情感词典（实际应用中可扩展更大词典）"""
         words = {
-            'positive': ['love', 'excellent', 'great', 'wonderful', 'amazing', 'best', 'happy'],
-            'negative': ['hate', 'terrible', 'awful', 'horrible', 'worst', 'angry', 'sad'],
-            'neutral': ['the', 'and', 'but', 'if', 'then', 'it', 'is']
+            'positive': ['love', 'excellent', 'great', 'wonderful', 'amazing', 'best', 'happy',
+                         '喜欢', '开心', '高兴', '满意', '优秀', '精彩', '不错'],
+            'negative': ['hate', 'terrible', 'awful', 'horrible', 'worst', 'angry', 'sad',
+                         '讨厌', '难过', '糟糕', '生气', '失望', '垃圾', '差劲'],
+            'neutral': ['the', 'and', 'but', 'if', 'then', 'it', 'is',
+                        '的', '了', '和', '但是', '如果', '然后', '是']
         }
         return words
 
     def analyze_sentiment(self, text):
         """分析文本情感"""
-        self.all_texts.append(text)
+        profiler = self.profiler
+        start = profiler.clock() if profiler.enabled else 0.0
+        self.corpus.add(text, self.tfidf.add_document(text))
+        if profiler.enabled:
+            profiler.record('tfidf_update', start)
+            polarity_start = profiler.clock()
 
         # 使用TextBlob进行基础情感分析
-        analysis = TextBlob(text)
-        polarity = analysis.sentiment.polarity
+        polarity = self._polarity(text)
+        if profiler.enabled:
+            profiler.record('polarity', polarity_start)
 
         # 确定情感类别
         if polarity > 0.1:
@@ -41,55 +251,115 @@ class SentimentAnalyzer:
             sentiment = 'neutral'
 
         self.history[sentiment] += 1
+        self.polarity_hist[polarity_bin(polarity)] += 1
+        self.metrics.record(sentiment, polarity)
+        if profiler.enabled:
+            profiler.record('analyze_sentiment', start)
         return sentiment, polarity
 
-    def extract_keywords(self, text):
-        """提取文本中的情感关键词"""
-        # 使用TF-IDF提取重要词汇
-        if len(self.all_texts) > 1:
-            tfidf_matrix = self.tfidf.fit_transform(self.all_texts)
-            feature_array = np.array(self.tfidf.get_feature_names_out())
-            tfidf_sorting = np.argsort(tfidf_matrix[-1].toarray()).flatten()[::-1]
-            top_keywords = feature_array[tfidf_sorting][:5]
+    def analyze_many(self, texts):
+        """批量分析文本情感，返回 (类别数组, 极性数组)
+
+        history 和关键词统计在整批分析完后只更新一次。
+        """
+        texts = list(texts)
+        profiler = self.profiler
+        start = profiler.clock() if profiler.enabled else 0.0
+        if self.workers is None or self.engine == 'lexicon':
+            # 每条文本只分一次词，词典打分和关键词统计共用同一份词流
+            streams = [self.tokenizer(text) for text in texts]
+            if profiler.enabled:
+                profiler.record('tokenize', start, len(texts))
+                polarity_start = profiler.clock()
+            if self.engine == 'lexicon':
+                polarities = self.lexicon_scorer.score_words([stream.words for stream in streams])
+            else:
+                polarities = np.fromiter((self._polarity(text) for text in texts), dtype=float, count=len(texts))
+            if profiler.enabled:
+                profiler.record('polarity', polarity_start, len(texts))
+                update_start = profiler.clock()
+            tfs = self.tfidf.add_terms([stream.terms for stream in streams])
+            if profiler.enabled:
+                profiler.record('tfidf_update', update_start, len(texts))
+        else:
+            # 多进程分块打分，各进程的文档频率合并回来
+            if self.scorer is None:
+                from sentiment_parallel import ParallelScorer
+                self.scorer = ParallelScorer(processes=self.workers, chunksize=self.chunksize,
+                                             ngram_range=(1, 2), stop_words='english', segmenter=self.segmenter)
+            if self.cache is None:
+                polarities, tfs, df = self.scorer.score(texts)
+            else:
+                # 缓存在主进程中查，只把未命中的文本交给工作进程打分
+                keys = [normalize_text(text) for text in texts]
+                known = [self.cache.get(key) for key in keys]
+                polarities, tfs, df = self.scorer.score(texts, known)
+                for key, value, polarity in zip(keys, known, polarities):
+                    if value is None:
+                        self.cache.put(key, float(polarity))
+            tfs = self.tfidf.add_analyzed(tfs, df)
+            if profiler.enabled:
+                profiler.record('parallel_score', start, len(texts))
+
+        # 与 analyze_sentiment 相同的阈值，向量化确定情感类别
+        labels = np.array(['neutral', 'positive', 'negative'])
+        codes = np.where(polarities > 0.1, 1, np.where(polarities < -0.1, 2, 0))
+        sentiments = labels[codes]
+
+        counts = np.bincount(codes, minlength=3)
+        for code, sentiment in enumerate(labels):
+            self.history[sentiment] += int(counts[code])
+        self.polarity_hist += np.bincount(polarity_bins(polarities), minlength=POLARITY_BINS)
+        # counts 按 labels 的顺序排列，换成 positive/negative/neutral 的顺序
+        self.metrics.record_many(counts[[1, 2, 0]], polarities)
+
+        self.corpus.add_many(texts, tfs)
+        if profiler.enabled:
+            profiler.record('analyze_many', start, len(texts))
+        return sentiments, polarities
+
+    def extract_keywords(self, text, k=None):
+        """提取文本中的情感关键词（k 为候选关键词个数，默认 keywords_k）"""
+        if k is None:
+            k = self.keywords_k
+        profiler = self.profiler
+        start = profiler.clock() if profiler.enabled else 0.0
+        # 使用增量TF-IDF提取重要词汇：只对当前文本的非零项打分并用堆取前 k 个，
+        # 代价与词表大小无关
+        if self.tfidf.n_docs > 1:
+            top_keywords = self.tfidf.top_keywords(text, k=k)
         else:
-            words = re.findall(r'\b\w+\b', text.lower())
-            top_keywords = sorted(set(words), key=lambda x: len(x), reverse=True)[:5]
+            words = self.tokenizer(text).words
+            top_keywords = sorted(set(words), key=lambda x: len(x), reverse=True)[:k]
+        if profiler.enabled:
+            profiler.record('keywords', start)
+            match_start = profiler.clock()
 
-        # 识别情感词汇
+        # 识别情感词汇，每个词只查一次词典
         sentiment_keywords = defaultdict(list)
         for word in top_keywords:
-            for sentiment, words_list in self.sentiment_words.items():
-                if word in words_list:
-                    sentiment_keywords[sentiment].append(word)
+            sentiment = self.lexicon.category(word)
+            if sentiment is not None:
+                sentiment_keywords[sentiment].append(word)
+        if profiler.enabled:
+            profiler.record('lexicon_match', match_start)
+            profiler.record('extract_keywords', start)
 
         return sentiment_keywords
 
     def visualize_sentiment(self):
         """创建情感可视化图表"""
-        plt.figure(figsize=(12, 5))
-
-        # 饼图
-        plt.subplot(1, 2, 1)
-        labels = ['Positive', 'Negative', 'Neutral']
-        sizes = [self.history['positive'], self.history['negative'], self.history['neutral']]
-        colors = ['#66c2a5', '#fc8d62', '#8da0cb']
-        plt.pie(sizes, labels=labels, colors=colors, autopct='%1.1f%%', startangle=90)
-        plt.axis('equal')
-        plt.title('Sentiment Distribution')
-
-        # 柱状图
-        plt.subplot(1, 2, 2)
-        plt.bar(labels, sizes, color=colors)
-        plt.title('Sentiment Count')
-        plt.ylabel('Number of Texts')
-
-        plt.tight_layout()
-        plt.savefig('sentiment_analysis.png')
-        plt.close()
-        print("图表已保存为 'sentiment_analysis.png'")
+        profiler = self.profiler
+        start = profiler.clock() if profiler.enabled else 0.0
+        self.renderer.render(self.history)
+        if profiler.enabled:
+            profiler.record('render', start)
+        print(f"图表已保存为 '{self.renderer.path}'")
 
     def analyze_and_visualize(self, text):
         """完整分析流程"""
+        profiler = self.profiler
+        start = profiler.clock() if profiler.enabled else 0.0
         print("\n" + "=" * 50)
         print(f"分析文本: \"{text}\"")
 
@@ -104,19 +374,90 @@ class SentimentAnalyzer:
             if words:
                 print(f"  - {sentiment_type.capitalize()}: {', '.join(words)}")
 
-        # 可视化
-        self.visualize_sentiment()
+        # 可视化（按设置的条数/时间节流，后台模式下不等待写文件）
+        render_start = profiler.clock() if profiler.enabled else 0.0
+        rendered = self.renderer.update(self.history)
+        if profiler.enabled and rendered:
+            profiler.record('render', render_start)
+        if rendered and not self.renderer.background:
+            print(f"图表已保存为 '{self.renderer.path}'")
         print("=" * 50 + "\n")
+        if profiler.enabled:
+            profiler.record('analyze_and_visualize', start)
+
+
+def parse_args():
+    import argparse
+
+    def positive_int(value):
+        number = int(value)
+        if number < 1:
+            raise argparse.ArgumentTypeError(f'应为正整数: {value}')
+        return number
+
+    parser = argparse.ArgumentParser(description='社交媒体情绪分析仪')
+    parser.add_argument('input', nargs='?',
+                        help="要分析的文件（每行一条文本或 JSONL），'-' 表示标准输入；不给出时进入交互模式")
+    parser.add_argument('--format', choices=['auto', 'text', 'jsonl'], default='auto',
+                        help='输入格式，auto 按扩展名判断（.jsonl/.json 为 JSONL）')
+    parser.add_argument('--field', default='text', help='JSONL 中文本所在的字段')
+    parser.add_argument('-o', '--output', help='结果输出文件，默认标准输出')
+    parser.add_argument('--output-format', choices=['jsonl', 'csv'], default='jsonl')
+    parser.add_argument('--chunk-size', type=positive_int, default=1000, help='每次批量分析的条数')
+    parser.add_argument('--keywords', action='store_true', help='输出每条文本的情感关键词')
+    parser.add_argument('--engine', choices=['textblob', 'lexicon'], default='textblob')
+    parser.add_argument('--workers', type=int, help='并行打分的进程数')
+    parser.add_argument('--max-texts', type=int, default=10000, help='关键词统计保留的最近文本条数')
+    parser.add_argument('--profile', action='store_true', help='结束时把各阶段耗时（Prometheus 文本格式）写到标准错误')
+    return parser.parse_args()
+
+
+def run_stream(args):
+    """流式处理文件或标准输入，只在最后打印情感统计"""
+    import contextlib
+    import sys
+    from sentiment_stream import ResultWriter, read_records, stream_analyze
+
+    fmt = args.format
+    if fmt == 'auto':
+        fmt = 'jsonl' if args.input.endswith(('.jsonl', '.json')) else 'text'
+
+    analyzer = SentimentAnalyzer(max_texts=args.max_texts, workers=args.workers, engine=args.engine,
+                                 profile=args.profile)
+    # 输入输出文件都在 with 中打开，后一个打开失败时前一个也会关闭；标准输入输出不关闭
+    with contextlib.ExitStack() as stack:
+        stack.callback(analyzer.close)
+        source = sys.stdin if args.input == '-' else stack.enter_context(open(args.input, 'r', encoding='utf-8'))
+        out = (sys.stdout if args.output is None
+               else stack.enter_context(open(args.output, 'w', encoding='utf-8', newline='')))
+        writer = ResultWriter(out, fmt=args.output_format, keywords=args.keywords)
+        try:
+            count = stream_analyze(analyzer, read_records(source, fmt=fmt, field=args.field), writer,
+                                   chunksize=args.chunk_size)
+        except ValueError as e:
+            # 输入中有不合法的行：已写出的结果保留，报告出错的行并以非零状态退出
+            sys.exit(f'错误: {e}')
+
+    # 统计信息写到标准错误，避免混进标准输出的结果里
+    print(f"共分析 {count} 条文本: {analyzer.history}", file=sys.stderr)
+    if args.profile:
+        sys.stderr.write(analyzer.prometheus_metrics())
 
 
 # 主程序
 if __name__ == "__main__":
-    analyzer = SentimentAnalyzer()
+    args = parse_args()
+    if args.input is not None:
+        run_stream(args)
+    else:
+        analyzer = SentimentAnalyzer(profile=args.profile)
 
-    print("社交媒体情绪分析仪 - 输入文本进行情绪分析 (输入'exit'退出)")
-    while True:
-        text = input("\n请输入文本: ")
-        if text.lower() == 'exit':
-            break
+        print("社交媒体情绪分析仪 - 输入文本进行情绪分析 (输入'exit'退出)")
+        while True:
+            text = input("\n请输入文本: ")
+            if text.lower() == 'exit':
+                if args.profile:
+                    print(analyzer.prometheus_metrics())
+                break
 
-        analyzer.analyze_and_visualize(text)
\ No newline at end of file
+            analyzer.analyze_and_visualize(text)
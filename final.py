@@ -5,16 +5,16 @@ import tkinter
 import tkinter.messagebox
 # 文件选择对话框
 import tkinter.filedialog
-# 时间控制，用于滚动延迟
-import time
-# 随机数生成，打乱名单顺序
-import random
-# 多线程，防止界面卡顿
-import threading
-# 迭代工具，创建循环迭代器
-import itertools
 # 操作系统接口，获取文件名
 import os
+# 名单的分块读取和紧凑存储
+import roster
+# 从名单中随机抽取名字
+import roster_draw
+# 用定时器逐帧滚动显示名单
+import roster_anim
+# 查看名单的窗口
+import roster_view
 
 # 主窗口设置
 root = tkinter.Tk()
@@ -25,8 +25,9 @@ root.resizable(False, False)
 
 # 关闭程序时执行的函数代码，停止滚动显示学生名单
 def closeWindow():
-    root.flag = False
-    time.sleep(0.1)
+    ticker.stop()
+    if loader is not None:
+        loader.cancel()
     root.destroy()
 
 
@@ -37,13 +38,21 @@ root.protocol('WM_DELETE_WINDOW', closeWindow)
 default_students = ['张三', '李四', '王五', '赵六', '周七', '钱八']
 
 # 当前使用的学生名单
-students = default_students.copy()
+students = roster.Roster(default_students)
+# 从当前名单中抽取名字，换名单时重新创建
+drawer = roster_draw.Drawer(students)
+# 是否在所有人都被抽到之前不重复
+no_repeat = tkinter.BooleanVar(root, value=False)
+# 是否按回答次数加权抽取（回答越少越容易被抽到，缺席的人不再被抽到）
+weighted = tkinter.BooleanVar(root, value=False)
 
 
-# 用于控制是否滚动显示学生名单
-root.flag = False
 # 用于记录当前使用的名单来源
 current_list_source = "默认名单"
+# 正在后台读取的名单文件
+loader = None
+# 查看名单的窗口（没有打开时为None）
+viewer = None
 
 
 # 上传自定义名单的函数
@@ -60,56 +69,67 @@ def upload_custom_list():
     if not filepath:  # 用户取消了选择
         return
 
-    # 检查用户是否取消了文件选择
-    try:
-        with open(filepath, 'r', encoding='utf-8') as file:
-            lines = file.readlines()
-
-        # 处理文件内容，提取名单
-        new_students = []
-        for line in lines:
-            # 去除空白字符，并按逗号、空格、制表符等分割
-            line = line.strip()
-            if not line:  # 跳过空行
-                continue
-
-            # 尝试多种分隔符
-            for separator in [',', '，', ';', '；', ' ', '\t']:
-                if separator in line:
-                    names = [name.strip() for name in line.split(separator) if name.strip()]
-                    new_students.extend(names)
-                    break
-            else:
-                # 如果没有分隔符，整行作为一个名字
-                new_students.append(line)
+    # 在后台线程中分块读取，主线程定时查看进度，读大文件时窗口不会卡住
+    global loader
+    loader = roster.RosterLoader(filepath).start()
+    btnUpload['state'] = 'disabled'
+    btnStart['state'] = 'disabled'
+    btnRestore['state'] = 'disabled'
+    root.after(50, check_loader, filepath)
 
-        if not new_students:
-            tkinter.messagebox.showwarning('警告', '文件中没有找到有效的名字！')
-            return
 
-        # 更新学生名单
-        global students, current_list_source
-        students = new_students
-        current_list_source = os.path.basename(filepath)
+# 显示读取进度，读完后更新名单
+def check_loader(filepath):
+    global loader, students, drawer, current_list_source
+    if loader is None:
+        return
+    if not loader.done:
+        lbl_status['text'] = f'正在加载 {loader.fraction:.0%}，已读 {loader.count} 人'
+        lbl_status['fg'] = 'gray'
+        root.after(50, check_loader, filepath)
+        return
 
-        # 更新状态标签
-        lbl_status['text'] = f'已加载: {current_list_source}'
-        lbl_status['fg'] = 'blue'
+    result = loader
+    loader = None
+    btnUpload['state'] = 'normal'
+    btnStart['state'] = 'normal'
+    btnRestore['state'] = 'normal'
 
-        # 显示加载结果
-        message = f'成功加载 {len(students)} 个名字:\n' + ', '.join(students[:10])
-        if len(students) > 10:
-            message += f'...等共{len(students)}人'
-        tkinter.messagebox.showinfo('名单加载成功', message)
+    if result.error is not None or not result.roster:
+        # 读取失败，状态标签恢复为原来的名单
+        if current_list_source == '默认名单':
+            lbl_status['text'] = '使用默认名单'
+            lbl_status['fg'] = 'black'
+        else:
+            lbl_status['text'] = f'已加载: {current_list_source}'
+            lbl_status['fg'] = 'blue'
+        if result.error is not None:
+            tkinter.messagebox.showerror('错误', f'读取文件时出错:\n{str(result.error)}')
+        else:
+            tkinter.messagebox.showwarning('警告', '文件中没有找到有效的名字！')
+        return
 
-    except Exception as e:
-        tkinter.messagebox.showerror('错误', f'读取文件时出错:\n{str(e)}')
+    # 更新学生名单
+    students = result.roster
+    drawer = roster_draw.Drawer(students, no_repeat=no_repeat.get(), weighted=weighted.get())
+    current_list_source = os.path.basename(filepath)
+
+    # 更新状态标签
+    lbl_status['text'] = f'已加载: {current_list_source}'
+    lbl_status['fg'] = 'blue'
+
+    # 显示加载结果
+    message = f'成功加载 {len(students)} 个名字:\n' + ', '.join(students[:10])
+    if len(students) > 10:
+        message += f'...等共{len(students)}人'
+    tkinter.messagebox.showinfo('名单加载成功', message)
 
 
 # 恢复默认名单
 def restore_default_list():
-    global students, current_list_source
-    students = default_students.copy()
+    global students, drawer, current_list_source
+    students = roster.Roster(default_students)
+    drawer = roster_draw.Drawer(students, no_repeat=no_repeat.get(), weighted=weighted.get())
     current_list_source = "默认名单"
     lbl_status['text'] = '使用默认名单'
     lbl_status['fg'] = 'black'
@@ -118,29 +138,27 @@ def restore_default_list():
 
 # 显示当前名单
 def show_current_list():
-    message = f'当前名单来源: {current_list_source}\n\n'
-    message += f'名单中共有 {len(students)} 人:\n\n'
+    global viewer
+    # 同一份名单的窗口已经打开时直接显示到最前面，否则关掉旧窗口重新打开
+    if viewer is not None and viewer.exists():
+        if viewer.names is students:
+            viewer.lift()
+            return
+        viewer.top.destroy()
+    # 窗口只显示看得到的几行，名单再长也能立即打开
+    viewer = roster_view.RosterWindow(root, students, current_list_source)
 
-    # 每行显示5个名字
-    for i in range(0, len(students), 5):
-        message += '  '.join(students[i:i + 5]) + '\n'
 
-    tkinter.messagebox.showinfo('当前名单', message)
+# 滚动显示一帧，由定时器在界面线程中调用
+def switch():
+    # 每次随机取一个名字，不用复制和打乱整份名单
+    lb1['text'] = lb2['text']
+    lb2['text'] = lb3['text']
+    lb3['text'] = drawer.pick()
 
 
-def switch():
-    root.flag = True
-    # 随机打乱学生名单
-    t = students.copy()
-    random.shuffle(t)
-    t = itertools.cycle(t)
-    while root.flag:
-        # 滚动显示
-        lb1['text'] = lb2['text']
-        lb2['text'] = lb3['text']
-        lb3['text'] = next(t)
-        # 数字可以修改，控制滚动速度
-        time.sleep(0.1)
+# 每100毫秒滚动一帧，数字可以修改，控制滚动速度
+ticker = roster_anim.Ticker(root, 100, switch)
 
 
 def btnStartClick():
@@ -149,21 +167,44 @@ def btnStartClick():
         tkinter.messagebox.showwarning('警告', '当前名单为空，请先上传名单！')
         return
 
-    # 每次单击"开始"按钮启动新线程，并禁用"开始"按钮,启用"停止"按钮
-    t = threading.Thread(target=switch)
-    t.start()
+    # 每次单击"开始"按钮启动滚动，并禁用"开始"按钮,启用"停止"按钮
+    ticker.start()
     btnStart['state'] = 'disabled'
     btnStop['state'] = 'normal'
     btnUpload['state'] = 'disabled'
     btnRestore['state'] = 'disabled'
 
 
+# 切换"不重复"模式，重新开始一轮
+def toggle_no_repeat():
+    drawer.no_repeat = no_repeat.get()
+    drawer.reset()
+
+
+# 切换加权模式，加权时"不重复"不起作用
+def toggle_weighted():
+    drawer.weighted = weighted.get()
+    chkNoRepeat['state'] = 'disabled' if weighted.get() else 'normal'
+
+
 def btnStopClick():
     # 单击"停止"按钮结束滚动显示,弹窗提示中奖名单,修改按钮状态
-    root.flag = False
-    time.sleep(0.3)
+    # 取消下一帧后滚动立即停止，不必等待
+    ticker.stop()
     if students:  # 确保名单不为空
-        tkinter.messagebox.showinfo('恭喜', f'本次中奖: {lb2["text"]}\n\n(来自: {current_list_source})')
+        # 中奖者由抽取器决定（不重复模式下本轮已抽到的人不会再中）
+        try:
+            lb2['text'] = drawer.draw()
+        except IndexError:
+            tkinter.messagebox.showwarning('警告', '名单中的人都已记为缺席，请取消加权或重新加载名单！')
+        else:
+            if drawer.weighted:
+                # 加权模式下记录本次结果，调整中奖者以后被抽到的机会
+                present = tkinter.messagebox.askyesno(
+                    '恭喜', f'本次中奖: {lb2["text"]}\n\n(来自: {current_list_source})\n\n到场回答了吗？选"否"记为缺席')
+                drawer.record(drawer.last, present)
+            else:
+                tkinter.messagebox.showinfo('恭喜', f'本次中奖: {lb2["text"]}\n\n(来自: {current_list_source})')
     btnStart['state'] = 'normal'
     btnStop['state'] = 'disabled'
     btnUpload['state'] = 'normal'
@@ -187,14 +228,22 @@ btnRestore.place(x=20, y=40, width=80, height=25)
 
 # 查看当前名单按钮
 btnShow = tkinter.Button(root, text='查看名单', command=show_current_list)
-btnShow.place(x=110, y=40, width=130, height=25)
+btnShow.place(x=110, y=40, width=60, height=25)
+
+# 不重复抽取的复选框
+chkNoRepeat = tkinter.Checkbutton(root, text='不重复', variable=no_repeat, command=toggle_no_repeat)
+chkNoRepeat.place(x=180, y=40, width=70, height=25)
+
+# 加权抽取的复选框
+chkWeighted = tkinter.Checkbutton(root, text='加权', variable=weighted, command=toggle_weighted)
+chkWeighted.place(x=205, y=133, width=60, height=25)
 
 # 状态标签
 lbl_status = tkinter.Label(root, text='使用默认名单')
 lbl_status.place(x=20, y=70, width=240, height=20)
 
 # 用于滚动显示学生名单的3个Label组件
-# 可以根据需要添加Label组件的数量,但要修改上面的线程函数代码
+# 可以根据需要添加Label组件的数量,但要修改上面的switch函数代码
 lb1 = tkinter.Label(root, text='')
 lb1.place(x=80, y=100, width=120, height=25)
 
@@ -0,0 +1,213 @@
+# -*- coding: utf-8 -*-
+# 随机提问程序的名单：分块流式读取名单文件，名字存放在紧凑的结构中
+# 不依赖 tkinter，final.py 和 期末大作业.py 共用
+import codecs
+import os
+import re
+import threading
+from array import array
+from itertools import accumulate, islice
+
+# 名字之间的分隔符：中英文逗号、分号和任意空白（含换行），一次正则扫描切出所有名字
+SEPARATORS = ',，;；'
+_NAME_RE = re.compile(f'[^{SEPARATORS}\\s]+')
+_SEPARATOR_RE = re.compile(f'[{SEPARATORS}\\s]')
+CHUNK_SIZE = 1 << 20
+
+
+class Roster:
+    """紧凑的名单：全部名字首尾相接存成一个字符串，另用数组记录每个名字的起止位置
+
+    按下标取名字是 O(1)。一百万个名字只占一个大字符串和一个 8 字节整数数组，
+    不必为每个名字保存一个 str 对象。
+    """
+
+    def __init__(self, names=()):
+        self.text = ''
+        # offsets[i] 与 offsets[i + 1] 之间是第 i 个名字
+        self.offsets = array('q', [0])
+        # 还没有拼进 text 的名字块，第一次按下标访问时再拼接
+        self.pending = []
+        # 查看名单时建立的 PrefixIndex，随名单一起释放；名单变化后作废
+        self.prefix_index = None
+        self.extend(names)
+
+    def extend(self, names):
+        """在末尾追加一批名字"""
+        names = list(names)
+        if not names:
+            return
+        self.pending.append(''.join(names))
+        self.prefix_index = None
+        # accumulate 的第一个值是原来的末尾位置，已经在数组中，跳过
+        self.offsets.extend(islice(accumulate(map(len, names), initial=self.offsets[-1]), 1, None))
+
+    def _flush(self):
+        if self.pending:
+            self.text = ''.join([self.text, *self.pending])
+            self.pending = []
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(len(self)))]
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError('名单下标超出范围')
+        self._flush()
+        return self.text[self.offsets[index]:self.offsets[index + 1]]
+
+    def __iter__(self):
+        self._flush()
+        text = self.text
+        offsets = self.offsets
+        for i in range(len(self)):
+            yield text[offsets[i]:offsets[i + 1]]
+
+    def memory_usage(self):
+        """名字和位置数组大致占用的字节数"""
+        self._flush()
+        return len(self.text.encode('utf-8')) + self.offsets.itemsize * len(self.offsets)
+
+
+def iter_name_chunks(file, chunk_size=CHUNK_SIZE, encoding='utf-8-sig'):
+    """从二进制文件中分块读取名字，每块产生 (名字列表, 已读字节数)
+
+    块边界上被截断的名字和多字节字符留到下一块，整个文件不会一次读进内存。
+    """
+    decoder = codecs.getincrementaldecoder(encoding)()
+    tail = ''
+    done = 0
+    while True:
+        data = file.read(chunk_size)
+        done += len(data)
+        text = tail + decoder.decode(data, final=not data)
+        names = _NAME_RE.findall(text)
+        # 没有以分隔符结尾时，最后一个名字可能还没读完
+        if data and names and not _SEPARATOR_RE.match(text[-1]):
+            tail = names.pop()
+        else:
+            tail = ''
+        yield names, done
+        if not data:
+            break
+
+
+def load_roster(path, chunk_size=CHUNK_SIZE, progress=None, cancelled=None):
+    """读取名单文件，返回 Roster
+
+    progress(已读字节数, 文件字节数, 已读名字数) 在每块读完后调用；
+    cancelled() 返回 True 时停止读取并返回 None。
+    """
+    total = os.path.getsize(path)
+    roster = Roster()
+    with open(path, 'rb') as file:
+        for names, done in iter_name_chunks(file, chunk_size):
+            if cancelled is not None and cancelled():
+                return None
+            roster.extend(names)
+            if progress is not None:
+                progress(done, total, len(roster))
+    return roster
+
+
+class RosterLoader:
+    """在后台线程中读取名单文件
+
+    线程只写下面这些属性，界面线程定时（如 root.after）读取它们来显示进度，
+    不在后台线程中操作任何控件：
+      fraction  已读比例（0~1）    count  已读名字数
+      done      是否结束           roster 结果（出错或取消时为 None）
+      error     出错时的异常
+    """
+
+    def __init__(self, path, chunk_size=CHUNK_SIZE):
+        self.path = path
+        self.chunk_size = chunk_size
+        self.fraction = 0.0
+        self.count = 0
+        self.done = False
+        self.roster = None
+        self.error = None
+        self._cancel = threading.Event()
+        self.thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _progress(self, done, total, count):
+        self.fraction = done / total if total else 1.0
+        self.count = count
+
+    def _run(self):
+        try:
+            self.roster = load_roster(self.path, self.chunk_size, self._progress, self._cancel.is_set)
+        except Exception as e:
+            self.error = e
+        finally:
+            self.done = True
+
+
+class PrefixIndex:
+    """名单的前缀索引，用于按开头的几个字查找名字（不区分大小写）
+
+    把每个名字按前两个字分桶，桶里是名字的下标（按名单顺序）。查一两个字的前缀直接取桶，
+    更长的前缀只在对应的桶里逐个比较；新前缀是上一次前缀的延长时（边输入边查），
+    只在上一次的结果里继续筛选。建索引是 O(n) 的逐个追加，可以放在后台线程中进行。
+    """
+
+    DEPTH = 2
+
+    def __init__(self, names):
+        self.names = names
+        buckets = {}
+        get = buckets.get
+        for i, key in enumerate(map(str.casefold, names)):
+            key = key[:self.DEPTH]
+            bucket = get(key)
+            if bucket is None:
+                bucket = buckets[key] = array('i')
+            bucket.append(i)
+        self.buckets = buckets
+        # 单字前缀由所有以该字开头的桶合并而成，第一次查到时再合并
+        self.first = {}
+        self.last_prefix = ''
+        self.last_result = None
+
+    def _bucket(self, key):
+        if len(key) >= self.DEPTH:
+            return self.buckets.get(key[:self.DEPTH], array('i'))
+        merged = self.first.get(key)
+        if merged is None:
+            merged = array('i')
+            for bucket_key, bucket in self.buckets.items():
+                if bucket_key[0] == key:
+                    merged.extend(bucket)
+            merged = self.first[key] = array('i', sorted(merged))
+        return merged
+
+    def search(self, prefix):
+        """返回以 prefix 开头的名字的下标数组（按名单顺序）"""
+        key = prefix.casefold()
+        if not key:
+            return array('i', range(len(self.names)))
+        if self.last_result is not None and len(self.last_prefix) >= self.DEPTH and key.startswith(self.last_prefix):
+            candidates = self.last_result
+        elif len(key) <= self.DEPTH:
+            candidates = None
+            result = self._bucket(key)
+        else:
+            candidates = self._bucket(key)
+        if candidates is not None:
+            names = self.names
+            result = array('i', [i for i in candidates if names[i].casefold().startswith(key)])
+        self.last_prefix = key
+        self.last_result = result
+        return result
@@ -0,0 +1,134 @@
+# -*- coding: utf-8 -*-
+# 随机提问程序的滚动动画：用 Tk 自己的定时器（after）逐帧滚动，不另开线程、不在界面线程中休眠
+# 只用到 root.after / root.after_cancel，final.py 和 期末大作业.py 共用
+#
+# 直接运行本文件会打开一个窗口滚动若干秒并多次停止，打印帧间隔和“停止到出结果”的耗时：
+#   python roster_anim.py [秒数]
+import logging
+import random
+import sys
+import time
+
+logger = logging.getLogger('roster')
+
+
+class FrameStats:
+    """帧间隔的累计统计：帧数、平均/最大间隔、与目标间隔的平均偏差、明显迟到（超过 1.5 倍）的帧数"""
+
+    def __init__(self, interval):
+        self.interval = interval
+        self.reset()
+
+    def reset(self):
+        self.frames = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.deviation = 0.0
+        self.late = 0
+
+    def record(self, elapsed):
+        self.frames += 1
+        self.total += elapsed
+        if elapsed > self.max:
+            self.max = elapsed
+        self.deviation += abs(elapsed - self.interval)
+        if elapsed > self.interval * 1.5:
+            self.late += 1
+
+    def to_dict(self):
+        return {
+            'frames': self.frames,
+            'interval_ms': self.interval * 1000,
+            'avg_ms': self.total / self.frames * 1000 if self.frames else 0.0,
+            'max_ms': self.max * 1000,
+            'jitter_ms': self.deviation / self.frames * 1000 if self.frames else 0.0,
+            'late': self.late,
+        }
+
+
+class Ticker:
+    """每隔 interval_ms 毫秒在界面线程中调用一次 tick()
+
+    下一帧按预定时刻而不是上一帧结束的时刻排期，偶尔一帧变慢不会让后面的帧整体推迟。
+    stop() 取消已经排好的下一帧后立即返回：tick 和按钮事件都在界面线程中执行，
+    stop() 返回之后 tick 一定不会再被调用，不需要标志位和等待。
+    """
+
+    def __init__(self, root, interval_ms, tick):
+        self.root = root
+        self.interval_ms = interval_ms
+        self.tick = tick
+        self.clock = time.perf_counter
+        self.stats = FrameStats(interval_ms / 1000)
+        self.job = None
+        self.due = 0.0
+        self.last = 0.0
+
+    @property
+    def running(self):
+        return self.job is not None
+
+    def start(self):
+        if self.job is not None:
+            return
+        self.stats.reset()
+        self.last = self.clock()
+        self.due = self.last + self.interval_ms / 1000
+        self.job = self.root.after(self.interval_ms, self._run)
+
+    def _run(self):
+        now = self.clock()
+        self.stats.record(now - self.last)
+        self.last = now
+        self.tick()
+        self.due += self.interval_ms / 1000
+        # 已经落后一帧以上时从现在重新排期，不连续补帧
+        if self.due < now:
+            self.due = now + self.interval_ms / 1000
+        self.job = self.root.after(max(0, round((self.due - self.clock()) * 1000)), self._run)
+
+    def stop(self):
+        if self.job is None:
+            return
+        self.root.after_cancel(self.job)
+        self.job = None
+        logger.debug('scroll stopped %s', self.stats.to_dict())
+
+
+def measure(seconds=5.0, interval_ms=100, stops=10):
+    """打开一个窗口滚动 seconds 秒，期间随机停止、立即重新开始 stops 次，返回帧统计和停止耗时（毫秒）"""
+    import tkinter
+
+    root = tkinter.Tk()
+    label = tkinter.Label(root, text='')
+    label.pack()
+    names = [f'学生{i}' for i in range(1000)]
+    ticker = Ticker(root, interval_ms, lambda: label.config(text=random.choice(names)))
+    frames = []
+    latencies = []
+
+    def stop_and_restart():
+        start = ticker.clock()
+        ticker.stop()
+        label.config(text=random.choice(names))
+        latencies.append((ticker.clock() - start) * 1000)
+        frames.append(ticker.stats.to_dict())
+        ticker.start()
+
+    ticker.start()
+    for _ in range(stops):
+        root.after(random.randrange(int(seconds * 1000)), stop_and_restart)
+    root.after(int(seconds * 1000), root.destroy)
+    root.mainloop()
+    frames.append(ticker.stats.to_dict())
+    return frames, latencies
+
+
+if __name__ == '__main__':
+    frames, latencies = measure(float(sys.argv[1]) if len(sys.argv) > 1 else 5.0)
+    total = sum(f['frames'] for f in frames)
+    print(f'帧数 {total}，平均间隔 {sum(f["avg_ms"] * f["frames"] for f in frames) / max(total, 1):.2f}ms，'
+          f'最大间隔 {max(f["max_ms"] for f in frames):.2f}ms，'
+          f'平均偏差 {sum(f["jitter_ms"] * f["frames"] for f in frames) / max(total, 1):.2f}ms，'
+          f'迟到帧 {sum(f["late"] for f in frames)}')
+    print(f'停止到出结果 {len(latencies)} 次，最大 {max(latencies, default=0):.3f}ms')
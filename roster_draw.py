@@ -0,0 +1,167 @@
+# -*- coding: utf-8 -*-
+# 随机提问程序的抽取：均匀抽取和不重复抽取每次 O(1)，加权抽取每次 O(log n)，不复制、不打乱整份名单
+# 不依赖 tkinter，final.py 和 期末大作业.py 共用
+import random
+from array import array
+
+# 加权抽取时回答过 k 次的人权重为 BASE // (k + 1)；BASE 能被 1~16 整除，前 15 次的权重都是精确的 1/(k+1)
+BASE_WEIGHT = 720720
+
+
+class FenwickTree:
+    """树状数组：n 个非负整数权重的前缀和
+
+    修改一个权重、按累计权重查找位置都是 O(log n)，权重为整数，反复修改不会累积误差。
+    """
+
+    def __init__(self, weights):
+        n = len(weights)
+        self.n = n
+        # tree[i]（从 1 开始）保存 (i - lowbit(i), i] 这一段权重的和，O(n) 建树
+        tree = array('q', [0])
+        tree.extend(weights)
+        for i in range(1, n + 1):
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.tree = tree
+        self.total = sum(weights)
+        # 不超过 n 的最大的 2 的幂，查找时从它开始折半
+        self.top = 1 << (n.bit_length() - 1) if n else 0
+
+    def add(self, index, delta):
+        """第 index 个权重加上 delta"""
+        tree = self.tree
+        n = self.n
+        i = index + 1
+        while i <= n:
+            tree[i] += delta
+            i += i & -i
+        self.total += delta
+
+    def prefix(self, count):
+        """前 count 个权重的和"""
+        tree = self.tree
+        result = 0
+        while count > 0:
+            result += tree[count]
+            count -= count & -count
+        return result
+
+    def find(self, target):
+        """返回前缀和第一次超过 target 的位置（0 <= target < total），权重为 0 的位置不会被选中"""
+        tree = self.tree
+        n = self.n
+        pos = 0
+        step = self.top
+        while step:
+            nxt = pos + step
+            if nxt <= n and tree[nxt] <= target:
+                pos = nxt
+                target -= tree[nxt]
+            step >>= 1
+        return pos
+
+
+class Drawer:
+    """从名单（Roster 或任何支持 len 和下标的序列）中随机抽名字
+
+    weighted 为 True 时按权重抽取：回答次数越多权重越小，缺席的人权重为 0，
+    权重放在树状数组中，抽取和每次回答后修改权重都是 O(log n)，此时不考虑 no_repeat。
+    否则 no_repeat 为 False 时每次独立均匀地抽取，可能连续抽到同一个人；
+    为 True 时所有人都被抽过一轮之前不会重复。不重复模式是逐步进行的 Fisher-Yates 洗牌：
+    下标数组 order 的前 remaining 个是本轮还没抽到的人，每次在其中随机选一个，
+    和第 remaining - 1 个交换后把 remaining 减一，被抽到的人就移到了数组后部。
+    一轮结束后 remaining 直接恢复为总人数，数组不必重建。
+    """
+
+    def __init__(self, names, no_repeat=False, weighted=False, rng=None):
+        self.names = names
+        self.rng = rng or random.Random()
+        self.no_repeat = no_repeat
+        self.weighted = weighted
+        # 下标数组在第一次不重复抽取时才建立，只用均匀抽取时不占内存
+        self.order = None
+        self.remaining = 0
+        # 每人的回答次数（缺席为 -1）和权重树在第一次加权抽取时才建立
+        self.answers = None
+        self.tree = None
+        # 最近一次 draw() 抽到的下标
+        self.last = None
+
+    def __len__(self):
+        return len(self.names)
+
+    def pick(self):
+        """均匀地随机取一个名字，不影响不重复模式的进度（用于滚动显示）"""
+        if not self.names:
+            raise IndexError('名单为空')
+        return self.names[self.rng.randrange(len(self.names))]
+
+    def draw(self):
+        """按当前模式抽出一个名字，抽到的下标记在 last 中"""
+        if not self.names:
+            raise IndexError('名单为空')
+        if self.weighted:
+            tree = self._weights()
+            if tree.total <= 0:
+                raise IndexError('名单中的人都已记为缺席')
+            self.last = tree.find(self.rng.randrange(tree.total))
+            return self.names[self.last]
+        if not self.no_repeat:
+            self.last = self.rng.randrange(len(self.names))
+            return self.names[self.last]
+        if self.order is None:
+            self.order = array('q', range(len(self.names)))
+            self.remaining = len(self.order)
+        if self.remaining == 0:
+            self.remaining = len(self.order)
+        order = self.order
+        last = self.remaining - 1
+        i = self.rng.randrange(self.remaining)
+        order[i], order[last] = order[last], order[i]
+        self.remaining = last
+        self.last = order[last]
+        return self.names[self.last]
+
+    def drawn(self):
+        """本轮已经抽到的人数"""
+        return len(self.order) - self.remaining if self.order is not None else 0
+
+    def reset(self):
+        """开始新的一轮，所有人都可以再被抽到"""
+        if self.order is not None:
+            self.remaining = len(self.order)
+
+    def _weights(self):
+        if self.tree is None:
+            n = len(self.names)
+            self.answers = array('l', [0]) * n
+            self.tree = FenwickTree(array('q', [BASE_WEIGHT]) * n)
+        return self.tree
+
+    def weight(self, index):
+        """第 index 个人当前的权重"""
+        if self.answers is None:
+            return BASE_WEIGHT
+        answers = self.answers[index]
+        return 0 if answers < 0 else BASE_WEIGHT // (answers + 1)
+
+    def _set_answers(self, index, answers):
+        tree = self._weights()
+        old = self.weight(index)
+        self.answers[index] = answers
+        tree.add(index, self.weight(index) - old)
+
+    def record(self, index, present=True):
+        """记录一次提问的结果：到场回答则回答次数加一，权重降低；缺席则权重为 0"""
+        self._weights()
+        if not present:
+            self._set_answers(index, -1)
+        else:
+            self._set_answers(index, max(self.answers[index], 0) + 1)
+
+    def reset_weights(self):
+        """清除回答次数和缺席记录，所有人权重恢复相同"""
+        self.answers = None
+        self.tree = None
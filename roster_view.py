@@ -0,0 +1,141 @@
+# -*- coding: utf-8 -*-
+# 随机提问程序的名单查看窗口：只显示可见的几十行，滚动时再取名字；输入开头的字即时筛选
+# final.py 和 期末大作业.py 共用
+import threading
+import tkinter
+
+from roster import PrefixIndex
+
+
+class RosterWindow:
+    """虚拟列表形式的名单窗口
+
+    Listbox 中始终只有 ROWS 行，滚动条和滚轮只改变第一行对应的位置，再重新填这几行，
+    打开窗口和滚动的耗时与名单长短无关。前缀索引在后台线程中建立，存在 Roster 上（同一份名单只建一次），
+    建好之前输入的内容在建好后再筛选。
+    """
+
+    ROWS = 18
+
+    def __init__(self, master, names, source=''):
+        self.names = names
+        # 筛选结果（名字下标的数组），None 表示显示整份名单
+        self.rows = None
+        self.first = 0
+        # Roster 上缓存着建好的索引；普通列表没有缓存
+        self.index = getattr(names, 'prefix_index', None)
+        self.pending = None
+
+        self.top = tkinter.Toplevel(master)
+        self.top.title('当前名单')
+        self.top.geometry('260x400')
+        self.top.resizable(False, False)
+
+        tkinter.Label(self.top, text=f'名单来源: {source}', anchor='w').place(x=10, y=5, width=240, height=20)
+        tkinter.Label(self.top, text='查找:').place(x=10, y=30, width=40, height=22)
+        self.query = tkinter.StringVar(self.top)
+        self.query.trace_add('write', self.on_query)
+        self.entry = tkinter.Entry(self.top, textvariable=self.query)
+        self.entry.place(x=50, y=30, width=200, height=22)
+        self.status = tkinter.Label(self.top, text='', anchor='w')
+        self.status.place(x=10, y=55, width=240, height=20)
+
+        self.listbox = tkinter.Listbox(self.top, height=self.ROWS, activestyle='none')
+        self.listbox.place(x=10, y=80, width=222, height=310)
+        self.scrollbar = tkinter.Scrollbar(self.top, command=self.on_scroll)
+        self.scrollbar.place(x=232, y=80, width=18, height=310)
+        for widget in (self.listbox, self.scrollbar):
+            widget.bind('<MouseWheel>', self.on_wheel)
+            widget.bind('<Button-4>', lambda event: self.scroll_by(-3))
+            widget.bind('<Button-5>', lambda event: self.scroll_by(3))
+        self.top.bind('<Prior>', lambda event: self.scroll_by(-self.ROWS))
+        self.top.bind('<Next>', lambda event: self.scroll_by(self.ROWS))
+        self.top.bind('<Control-Home>', lambda event: self.scroll_to(0))
+        self.top.bind('<Control-End>', lambda event: self.scroll_to(len(self)))
+
+        # 先在界面线程中显示第一屏（名单在这里拼接好），再在后台读名单建索引
+        self.render()
+        if self.index is None:
+            threading.Thread(target=self._build_index, daemon=True).start()
+        self.entry.focus_set()
+
+    def _build_index(self):
+        index = PrefixIndex(self.names)
+        if hasattr(self.names, 'prefix_index'):
+            self.names.prefix_index = index
+        self.index = index
+
+    def __len__(self):
+        return len(self.names) if self.rows is None else len(self.rows)
+
+    def name(self, row):
+        i = row if self.rows is None else self.rows[row]
+        return f'{i + 1}. {self.names[i]}'
+
+    def render(self):
+        """用当前位置重新填 Listbox 中的可见行，并更新滚动条和人数"""
+        total = len(self)
+        self.first = max(0, min(self.first, total - self.ROWS))
+        last = min(total, self.first + self.ROWS)
+        self.listbox.delete(0, tkinter.END)
+        self.listbox.insert(tkinter.END, *[self.name(row) for row in range(self.first, last)])
+        if total:
+            self.scrollbar.set(self.first / total, last / total)
+        else:
+            self.scrollbar.set(0, 1)
+        if self.pending is not None:
+            self.status['text'] = '正在建立索引…'
+        elif self.rows is None:
+            self.status['text'] = f'共 {total} 人'
+        else:
+            self.status['text'] = f'找到 {total} 人'
+
+    def scroll_to(self, first):
+        self.first = first
+        self.render()
+
+    def scroll_by(self, rows):
+        self.scroll_to(self.first + rows)
+
+    def on_scroll(self, action, amount, unit=None):
+        # 滚动条回调：('moveto', 比例) 或 ('scroll', 步数, 'units'/'pages')
+        if action == 'moveto':
+            self.scroll_to(int(float(amount) * len(self)))
+        else:
+            self.scroll_by(int(amount) * (self.ROWS if unit == 'pages' else 1))
+
+    def on_wheel(self, event):
+        # Windows 每格 delta 为 120，macOS 为较小的整数
+        step = event.delta // 120 if abs(event.delta) >= 120 else event.delta
+        self.scroll_by(-3 * step)
+
+    def on_query(self, *args):
+        query = self.query.get().strip()
+        if not query:
+            self.rows = None
+            self.pending = None
+        elif self.index is None:
+            # 索引还没建好，稍后再查（只保留一个等待中的定时器）
+            if self.pending is None:
+                self.pending = self.top.after(50, self._retry)
+        else:
+            self.pending = None
+            self.rows = self.index.search(query)
+        self.first = 0
+        self.render()
+
+    def _retry(self):
+        self.pending = None
+        if self.exists():
+            self.on_query()
+
+    def lift(self):
+        self.top.deiconify()
+        self.top.lift()
+        self.entry.focus_set()
+
+    def exists(self):
+        try:
+            return bool(self.top.winfo_exists())
+        except tkinter.TclError:
+            return False
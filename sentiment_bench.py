@@ -0,0 +1,435 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的性能测试
+# 用法: python sentiment_bench.py parallel --texts 20000 --max-workers 8
+#       python sentiment_bench.py engines --texts 20000
+#       python sentiment_bench.py startup --runs 5
+#       python sentiment_bench.py shards --texts 20000 --shards 4
+#       python sentiment_bench.py topk --sizes 10000 1000000 10000000
+#       python sentiment_bench.py segment --texts 20000 --dict-words 0 300000
+#       python sentiment_bench.py suite --sizes 100 1000 10000 -o results.json
+#       python sentiment_bench.py compare old.json new.json
+import argparse
+import contextlib
+import json
+import os
+import random
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from sentiment_loader import HERE, load_analyzer_module
+
+_POSITIVE = ['love', 'excellent', 'great', 'wonderful', 'amazing', 'best', 'happy', 'good', 'nice']
+_NEGATIVE = ['hate', 'terrible', 'awful', 'horrible', 'worst', 'angry', 'sad', 'bad', 'boring']
+_TOPICS = ['movie', 'phone', 'battery', 'service', 'food', 'game', 'update', 'concert', 'team',
+           'weather', 'traffic', 'coffee', 'price', 'delivery', 'camera', 'show', 'album', 'app']
+_ZH_POSITIVE = ['喜欢', '开心', '满意', '优秀', '精彩', '不错', '好用', '推荐']
+_ZH_NEGATIVE = ['讨厌', '难过', '糟糕', '生气', '失望', '垃圾', '差劲', '后悔']
+_ZH_TOPICS = ['电影', '手机', '电池', '服务', '快递', '游戏', '更新', '演唱会', '天气', '交通', '咖啡', '价格',
+              '相机', '专辑', '软件', '客服']
+_ZH_FILLER = ['今天', '这个', '我', '的', '了', '真的', '非常', '有点', '感觉', '就是', '很', '也', '还是', '又']
+_FILLER = ['the', 'this', 'my', 'new', 'today', 'really', 'so', 'just', 'is', 'was', 'and', 'but', 'very']
+
+
+def make_corpus(n, seed=0):
+    """生成 n 条合成的社交媒体短文"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        words = [rng.choice(_FILLER) for _ in range(rng.randint(3, 12))]
+        words += rng.sample(_TOPICS, rng.randint(1, 3))
+        mood = rng.random()
+        if mood < 0.4:
+            words += rng.sample(_POSITIVE, rng.randint(1, 2))
+        elif mood < 0.8:
+            words += rng.sample(_NEGATIVE, rng.randint(1, 2))
+        rng.shuffle(words)
+        text = ' '.join(words)
+        if rng.random() < 0.3:
+            text += rng.choice(['!', '!!', ' :)', ' :(', ' #' + rng.choice(_TOPICS)])
+        texts.append(text)
+    return texts
+
+
+def make_chinese_corpus(n, seed=0):
+    """生成 n 条合成的中文社交媒体短文（词之间没有空格）"""
+    rng = random.Random(seed)
+    texts = []
+    for _ in range(n):
+        words = [rng.choice(_ZH_FILLER) for _ in range(rng.randint(3, 12))]
+        words += rng.sample(_ZH_TOPICS, rng.randint(1, 3))
+        mood = rng.random()
+        if mood < 0.4:
+            words += rng.sample(_ZH_POSITIVE, rng.randint(1, 2))
+        elif mood < 0.8:
+            words += rng.sample(_ZH_NEGATIVE, rng.randint(1, 2))
+        rng.shuffle(words)
+        text = ''.join(words)
+        if rng.random() < 0.3:
+            text += rng.choice(['！', '！！', '。', '～', ' #' + rng.choice(_ZH_TOPICS)])
+        texts.append(text)
+    return texts
+
+
+def warm_up(analyzer):
+    """提前导入延迟加载的依赖（TextBlob），不计入后面的计时"""
+    if analyzer.engine == 'textblob':
+        analyzer.polarity_analyzer
+
+
+def bench_parallel(n_texts, max_workers, chunksize):
+    """比较串行与 1..max_workers 个进程的 analyze_many 吞吐量"""
+    module = load_analyzer_module()
+    texts = make_corpus(n_texts)
+
+    analyzer = module.SentimentAnalyzer(max_texts=None)
+    warm_up(analyzer)
+    start = time.perf_counter()
+    analyzer.analyze_many(texts)
+    serial = time.perf_counter() - start
+    print(f'serial     {n_texts / serial:10.0f} texts/s')
+
+    for workers in range(1, max_workers + 1):
+        parallel = module.SentimentAnalyzer(max_texts=None, workers=workers, chunksize=chunksize)
+        # 计时包含进程池的启动
+        start = time.perf_counter()
+        parallel.analyze_many(texts)
+        elapsed = time.perf_counter() - start
+        parallel.close()
+        print(f'workers={workers:<3}{n_texts / elapsed:10.0f} texts/s  speedup {serial / elapsed:.2f}x')
+        assert parallel.history == analyzer.history and parallel.tfidf.df == analyzer.tfidf.df
+
+
+def bench_engines(n_texts):
+    """比较 TextBlob 与情感词典两种打分引擎的 analyze_many 吞吐量（不使用缓存）"""
+    module = load_analyzer_module()
+    texts = make_corpus(n_texts)
+    rates = {}
+    for engine in ('textblob', 'lexicon'):
+        analyzer = module.SentimentAnalyzer(max_texts=None, cache_size=0, engine=engine)
+        warm_up(analyzer)
+        start = time.perf_counter()
+        sentiments, _ = analyzer.analyze_many(texts)
+        elapsed = time.perf_counter() - start
+        rates[engine] = n_texts / elapsed
+        print(f'{engine:<10}{rates[engine]:10.0f} texts/s  {analyzer.history}')
+    print(f'lexicon/textblob  {rates["lexicon"] / rates["textblob"]:.1f}x')
+
+    # 只计打分本身，不含分词和关键词统计
+    analyzer = module.SentimentAnalyzer(engine='lexicon', token_cache_size=0)
+    docs = [analyzer.tokenizer(text).words for text in texts]
+    start = time.perf_counter()
+    analyzer.lexicon_scorer.score_words(docs)
+    print(f'lexicon scoring only {n_texts / (time.perf_counter() - start):10.0f} texts/s')
+
+
+# 在全新的解释器中运行：导入模块、建分析器、得到第一条结果，分别计时
+_STARTUP_SCRIPT = """
+import json, sys, time
+start = time.perf_counter()
+sys.path.insert(0, {here!r})
+from sentiment_loader import load_analyzer_module
+module = load_analyzer_module()
+imported = time.perf_counter()
+analyzer = module.SentimentAnalyzer(engine={engine!r})
+analyzer.analyze_sentiment('I love this great phone')
+first = time.perf_counter()
+analyzer.extract_keywords('I love this great phone')
+keywords = time.perf_counter()
+print(json.dumps({{'import': imported - start, 'first_result': first - start, 'first_keywords': keywords - start}}))
+"""
+
+
+def bench_startup(runs):
+    """冷启动耗时：导入 emotion study.py、第一条情感结果、第一次关键词提取（中位数，秒）"""
+    for engine in ('textblob', 'lexicon'):
+        script = _STARTUP_SCRIPT.format(here=HERE, engine=engine)
+        samples = []
+        for _ in range(runs):
+            output = subprocess.run([sys.executable, '-c', script], capture_output=True, text=True, check=True)
+            samples.append(json.loads(output.stdout))
+        medians = {key: statistics.median(sample[key] for sample in samples) for key in samples[0]}
+        print(f'{engine:<10}' + '  '.join(f'{key} {value:.3f}s' for key, value in medians.items()))
+
+
+def _analyze_shard(texts):
+    """在独立进程中分析一个分片，返回序列化后的状态"""
+    analyzer = load_analyzer_module().SentimentAnalyzer(max_texts=None)
+    analyzer.analyze_many(texts)
+    return analyzer.get_state().dumps()
+
+
+def bench_shards(n_texts, n_shards):
+    """分片在各自进程中分析后合并，检查与单个分析器的统计和关键词完全一致"""
+    from sentiment_state import AnalyzerState
+
+    module = load_analyzer_module()
+    texts = make_corpus(n_texts)
+    shards = [texts[i::n_shards] for i in range(n_shards)]
+
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=n_shards) as executor:
+        states = [AnalyzerState.loads(data) for data in executor.map(_analyze_shard, shards)]
+    merged = AnalyzerState.merge_all(states)
+    sharded = time.perf_counter() - start
+
+    single = module.SentimentAnalyzer(max_texts=None)
+    start = time.perf_counter()
+    single.analyze_many(texts)
+    serial = time.perf_counter() - start
+
+    combined = module.SentimentAnalyzer(max_texts=None)
+    combined.merge_state(merged)
+    same_keywords = all(combined.extract_keywords(text) == single.extract_keywords(text) for text in texts[:1000])
+    print(f'{n_shards} shards {sharded:.2f}s  single {serial:.2f}s  '
+          f'state equal: {merged == single.get_state()}  keywords equal: {same_keywords}')
+
+
+def bench_topk(sizes, k, max_dict, repeats=200):
+    """关键词选取在不同词表宽度下的耗时（微秒/次）
+
+    dense    原来的做法：把一行 TF-IDF 展开成词表宽度的稠密向量后整体排序
+    sparse   只在该行的非零项上 argpartition 取前 k 个
+    engine   IncrementalTfidf.top_keywords（文档频率表中有 size 个词；
+             超过 max_dict 时跳过，避免占用过多内存）
+    """
+    from scipy import sparse
+    from sentiment_keywords import IncrementalTfidf
+
+    rng = random.Random(0)
+    text = make_corpus(1, seed=1)[0]
+    for size in sizes:
+        nnz = 30
+        columns = sorted(rng.sample(range(size), nnz))
+        row = sparse.csr_matrix(([rng.random() for _ in columns], ([0] * nnz, columns)), shape=(1, size))
+
+        start = time.perf_counter()
+        for _ in range(max(1, repeats // 20)):
+            np.argsort(row.toarray()).flatten()[::-1][:k]
+        dense = (time.perf_counter() - start) / max(1, repeats // 20)
+
+        start = time.perf_counter()
+        for _ in range(repeats):
+            data = row.data
+            top = np.argpartition(-data, min(k, len(data)) - 1)[:k]
+            row.indices[top[np.argsort(-data[top])]]
+        sparse_time = (time.perf_counter() - start) / repeats
+
+        line = f'vocab={size:<10} dense {dense * 1e6:12.1f}us  sparse {sparse_time * 1e6:8.1f}us'
+        if size <= max_dict:
+            engine = IncrementalTfidf()
+            engine.merge({f'term{i}': 1 + i % 7 for i in range(size)}, size)
+            engine.add_document(text)
+            start = time.perf_counter()
+            for _ in range(repeats):
+                engine.top_keywords(text, k=k)
+            line += f'  engine {(time.perf_counter() - start) / repeats * 1e6:8.1f}us'
+        print(line)
+
+
+def bench_segment(n_texts, dict_sizes):
+    """中文分词与英文分词的吞吐量对比
+
+    对每种分词词典规模（在内置词典之外再加入 dict_words 个随机的二到四字词），
+    给出词典内存、编译后文件的载入耗时，以及英文和中文语料的分词与 lexicon 引擎 analyze_many 吞吐量。
+    """
+    from sentiment_segment import ChineseSegmenter
+
+    module = load_analyzer_module()
+    corpora = {'english': make_corpus(n_texts), 'chinese': make_chinese_corpus(n_texts)}
+    rng = random.Random(0)
+    alphabet = [chr(code) for code in range(0x4e00, 0x4e00 + 3000)]
+    for dict_words in dict_sizes:
+        analyzer = module.SentimentAnalyzer(max_texts=None, cache_size=0, engine='lexicon', token_cache_size=0)
+        segmenter = analyzer.segmenter
+        for _ in range(dict_words):
+            segmenter.add(''.join(rng.choices(alphabet, k=rng.randint(2, 4))), rng.randint(1, 1000))
+        with tempfile.TemporaryDirectory() as tmp:
+            path = os.path.join(tmp, 'dict.marshal')
+            segmenter.dump(path)
+            start = time.perf_counter()
+            ChineseSegmenter.from_compiled(path)
+            load_time = time.perf_counter() - start
+        memory = segmenter.memory_usage()
+        print(f'dict={memory["words"]:<8} {memory["bytes"] / 2 ** 20:7.1f}MB  load compiled {load_time * 1000:8.1f}ms')
+
+        for language, texts in corpora.items():
+            chars = sum(map(len, texts))
+            start = time.perf_counter()
+            for text in texts:
+                analyzer.tokenizer(text)
+            tokenize = time.perf_counter() - start
+            start = time.perf_counter()
+            analyzer.analyze_many(texts)
+            analyze = time.perf_counter() - start
+            print(f'  {language:<8} tokenize {n_texts / tokenize:9.0f} texts/s {chars / tokenize / 1e6:6.2f}M chars/s  '
+                  f'analyze_many {n_texts / analyze:9.0f} texts/s')
+        print(f'  {analyzer.history}')
+
+
+def _summarize(latencies):
+    latencies = np.array(latencies)
+    return {
+        'calls': len(latencies),
+        'per_sec': len(latencies) / latencies.sum(),
+        'mean_ms': latencies.mean() * 1000,
+        'p50_ms': float(np.percentile(latencies, 50)) * 1000,
+        'p99_ms': float(np.percentile(latencies, 99)) * 1000,
+        'max_ms': latencies.max() * 1000,
+    }
+
+
+def _time_calls(function, args):
+    latencies = []
+    for arg in args:
+        start = time.perf_counter()
+        function(*arg)
+        latencies.append(time.perf_counter() - start)
+    return latencies
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=HERE, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def bench_suite(sizes, calls, render_calls, engine):
+    """流水线各阶段在不同历史语料规模下的吞吐量和延迟
+
+    每个规模先用 analyze_many 灌入 size 条历史文本，再逐条计时：
+    analyze_sentiment、extract_keywords（各 calls 次），
+    visualize_sentiment、analyze_and_visualize（各 render_calls 次，画图较慢）。
+    """
+    module = load_analyzer_module()
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        for size in sizes:
+            corpus = make_corpus(size + calls + render_calls, seed=size)
+            history, probe, render_probe = corpus[:size], corpus[size:size + calls], corpus[size + calls:]
+            analyzer = module.SentimentAnalyzer(max_texts=None, engine=engine,
+                                                chart_path=os.path.join(tmp, 'chart.png'))
+            warm_up(analyzer)
+            analyzer.analyze_many(history)
+            # 第一次画图要导入 matplotlib 并创建图，不计入结果
+            analyzer.renderer.render(analyzer.history)
+
+            # 打印的内容不计入结果
+            with open(os.devnull, 'w') as devnull, contextlib.redirect_stdout(devnull):
+                stages = {
+                    'analyze_sentiment': _time_calls(analyzer.analyze_sentiment, [(t,) for t in probe]),
+                    'extract_keywords': _time_calls(analyzer.extract_keywords, [(t,) for t in probe]),
+                    'visualize_sentiment': _time_calls(analyzer.visualize_sentiment, [()] * render_calls),
+                    'analyze_and_visualize': _time_calls(analyzer.analyze_and_visualize,
+                                                         [(t,) for t in render_probe]),
+                }
+            for stage, latencies in stages.items():
+                results.append({'corpus_size': size, 'stage': stage, **_summarize(latencies)})
+                print(f'size={size:<8} {stage:<22} {results[-1]["per_sec"]:10.1f}/s  '
+                      f'p50 {results[-1]["p50_ms"]:8.3f}ms  p99 {results[-1]["p99_ms"]:8.3f}ms', file=sys.stderr)
+
+    return {
+        'commit': _git_commit(),
+        'python': sys.version.split()[0],
+        'engine': engine,
+        'time': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'results': results,
+    }
+
+
+def compare_results(old_path, new_path, threshold):
+    """对比两次 suite 的结果，平均延迟变慢超过 threshold 的标记为回退，返回回退条数"""
+    with open(old_path, encoding='utf-8') as file:
+        old = {(r['corpus_size'], r['stage']): r for r in json.load(file)['results']}
+    with open(new_path, encoding='utf-8') as file:
+        new = json.load(file)['results']
+
+    regressions = 0
+    for result in new:
+        key = (result['corpus_size'], result['stage'])
+        if key not in old:
+            continue
+        ratio = result['mean_ms'] / old[key]['mean_ms']
+        flag = ''
+        if ratio > 1 + threshold:
+            flag = '  REGRESSION'
+            regressions += 1
+        print(f'size={key[0]:<8} {key[1]:<22} {old[key]["mean_ms"]:9.3f}ms -> {result["mean_ms"]:9.3f}ms  '
+              f'x{ratio:.2f}{flag}')
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description='情绪分析仪性能测试')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    parallel = commands.add_parser('parallel', help='多进程打分的扩展性')
+    parallel.add_argument('--texts', type=int, default=20000)
+    parallel.add_argument('--max-workers', type=int, default=os.cpu_count())
+    parallel.add_argument('--chunksize', type=int, default=500)
+
+    engines = commands.add_parser('engines', help='TextBlob 与情感词典打分引擎对比')
+    engines.add_argument('--texts', type=int, default=20000)
+
+    startup = commands.add_parser('startup', help='从导入到第一条结果的冷启动耗时')
+    startup.add_argument('--runs', type=int, default=5)
+
+    shards = commands.add_parser('shards', help='分片分析后合并状态')
+    shards.add_argument('--texts', type=int, default=20000)
+    shards.add_argument('--shards', type=int, default=4)
+
+    topk = commands.add_parser('topk', help='不同词表宽度下的关键词选取耗时')
+    topk.add_argument('--sizes', type=int, nargs='+', default=[10000, 1000000, 10000000])
+    topk.add_argument('-k', type=int, default=5)
+    topk.add_argument('--max-dict', type=int, default=1000000, help='engine 测试的最大词表（受内存限制）')
+
+    segment = commands.add_parser('segment', help='中文分词与英文分词的吞吐量对比')
+    segment.add_argument('--texts', type=int, default=20000)
+    segment.add_argument('--dict-words', type=int, nargs='+', default=[0, 300000],
+                         help='在内置分词词典之外加入的随机词条数')
+
+    suite = commands.add_parser('suite', help='各阶段吞吐量/延迟，输出 JSON')
+    suite.add_argument('--sizes', type=int, nargs='+', default=[100, 1000, 10000], help='历史语料规模')
+    suite.add_argument('--calls', type=int, default=500, help='分析/关键词阶段每个规模的计时次数')
+    suite.add_argument('--render-calls', type=int, default=10, help='画图阶段每个规模的计时次数')
+    suite.add_argument('--engine', choices=['textblob', 'lexicon'], default='textblob')
+    suite.add_argument('-o', '--output', help='结果写入的 JSON 文件，默认标准输出')
+
+    compare = commands.add_parser('compare', help='对比两次 suite 的结果')
+    compare.add_argument('old')
+    compare.add_argument('new')
+    compare.add_argument('--threshold', type=float, default=0.1, help='视为回退的变慢比例')
+
+    args = parser.parse_args()
+    if args.command == 'parallel':
+        bench_parallel(args.texts, args.max_workers, args.chunksize)
+    elif args.command == 'engines':
+        bench_engines(args.texts)
+    elif args.command == 'startup':
+        bench_startup(args.runs)
+    elif args.command == 'shards':
+        bench_shards(args.texts, args.shards)
+    elif args.command == 'topk':
+        bench_topk(args.sizes, args.k, args.max_dict)
+    elif args.command == 'segment':
+        bench_segment(args.texts, args.dict_words)
+    elif args.command == 'suite':
+        report = bench_suite(args.sizes, args.calls, args.render_calls, args.engine)
+        if args.output:
+            with open(args.output, 'w', encoding='utf-8') as file:
+                json.dump(report, file, indent=2)
+        else:
+            print(json.dumps(report, indent=2))
+    elif args.command == 'compare':
+        sys.exit(1 if compare_results(args.old, args.new, args.threshold) else 0)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,62 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的极性缓存：重复文本（转发、刷屏、机器人）不再重复打分
+import json
+import os
+from collections import OrderedDict
+
+
+def normalize_text(text):
+    """缓存键：忽略大小写，连续空白折叠为一个空格"""
+    return ' '.join(text.casefold().split())
+
+
+class PolarityCache:
+    """按规范化文本缓存极性分数的 LRU 缓存，带命中/未命中计数"""
+
+    def __init__(self, maxsize=100000):
+        self.maxsize = maxsize
+        self.data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self):
+        return len(self.data)
+
+    def get(self, key):
+        """命中时返回极性并标记为最近使用，否则返回 None"""
+        polarity = self.data.get(key)
+        if polarity is None:
+            self.misses += 1
+            return None
+        self.data.move_to_end(key)
+        self.hits += 1
+        return polarity
+
+    def put(self, key, polarity):
+        self.data[key] = polarity
+        self.data.move_to_end(key)
+        if len(self.data) > self.maxsize:
+            self.data.popitem(last=False)
+
+    def stats(self):
+        total = self.hits + self.misses
+        return {
+            'size': len(self.data),
+            'maxsize': self.maxsize,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / total if total else 0.0,
+        }
+
+    def save(self, path):
+        """按使用顺序写入 JSON 文件，先写临时文件再替换，避免留下半个文件"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(list(self.data.items()), file, ensure_ascii=False)
+        os.replace(tmp_path, path)
+
+    def load(self, path):
+        """从 save 写出的文件恢复缓存，让重启后的进程直接命中"""
+        with open(path, 'r', encoding='utf-8') as file:
+            for key, polarity in json.load(file):
+                self.put(key, polarity)
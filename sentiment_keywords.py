@@ -0,0 +1,218 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的关键词统计模块
+import heapq
+import math
+import sys
+import zlib
+from collections import Counter
+
+import numpy as np
+
+from sentiment_tokens import Tokenizer
+
+
+class IncrementalTfidf:
+    """增量TF-IDF：累计文档频率，每次只对新文档打分
+
+    与每次对全部历史文本 fit_transform 的结果一致（平滑idf、原始词频），
+    但单条文本的代价只与该文本长度有关，不随历史增长。
+    """
+
+    def __init__(self, ngram_range=(1, 2), stop_words='english', tokenizer=None):
+        self.ngram_range = ngram_range
+        self.stop_words = stop_words
+        # 可以传入与打分、关键词提取共用的分词器，同一条文本只分词一次
+        if tokenizer is None:
+            tokenizer = Tokenizer(ngram_range=ngram_range, stop_words=stop_words)
+        self.tokenizer = tokenizer
+        # df 记录文档频率；从快照恢复时，快照中的只读文档频率放在 base 中，
+        # df 只记录相对 base 的增减（可以为负）
+        self.df = Counter()
+        self.base = None
+        self.n_docs = 0
+
+    def analyze(self, text):
+        """文本的 n-gram 词频（与 TfidfVectorizer 的分词规则一致），结果与分词器共享，不要修改"""
+        return self.tokenizer(text).terms
+
+    def add_document(self, text):
+        """加入一篇文档，更新文档频率，返回它的词频"""
+        tf = self.analyze(text)
+        self.df.update(tf.keys())
+        self.n_docs += 1
+        return tf
+
+    def add_documents(self, texts):
+        """批量加入文档，一次性更新文档频率，返回每篇的词频列表"""
+        return self.add_terms([self.analyze(text) for text in texts])
+
+    def add_terms(self, tfs):
+        """批量加入已经分好词的文档（每篇的 n-gram 词频），返回保存用的词频列表"""
+        self.df.update(term for tf in tfs for term in tf)
+        self.n_docs += len(tfs)
+        return tfs
+
+    def merge(self, df, n_docs):
+        """合并在别处（如工作进程）统计好的文档频率"""
+        self.df.update(df)
+        self.n_docs += n_docs
+
+    def add_analyzed(self, tfs, df):
+        """加入在别处分好词的文档（tfs 为每篇词频，df 为它们合计的文档频率），返回 tfs"""
+        self.merge(df, len(tfs))
+        return tfs
+
+    def remove_document(self, tf):
+        """移除一篇之前加入的文档（传入 add_document 的返回值）"""
+        for term in tf:
+            count = self.df[term] - 1
+            if count:
+                self.df[term] = count
+            else:
+                del self.df[term]
+        self.n_docs -= 1
+
+    def doc_freq(self, term):
+        """词的文档频率"""
+        if self.base is None:
+            return self.df.get(term, 0)
+        return self.base.get(term) + self.df.get(term, 0)
+
+    def document_frequencies(self):
+        """全部文档频率（合并 base 后的 Counter）"""
+        if self.base is None:
+            return Counter(self.df)
+        df = Counter(dict(self.base.items()))
+        df.update(self.df)
+        return +df
+
+    def idf(self, term):
+        """平滑idf，与 TfidfVectorizer(smooth_idf=True) 相同"""
+        return math.log((1 + self.n_docs) / (1 + self.doc_freq(term))) + 1
+
+    def score(self, tf):
+        """计算一篇文档的 TF-IDF 权重（未归一化，不影响排序）"""
+        return {term: count * self.idf(term) for term, count in tf.items()}
+
+    def top_keywords(self, text, k=5):
+        """返回文本中 TF-IDF 最高的 k 个词，同分时按词倒序"""
+        scores = self.score(self.analyze(text))
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+        return [term for term, _ in top]
+
+    def memory_usage(self):
+        """词表大小及其大致占用的字节数"""
+        nbytes = sys.getsizeof(self.df) + sum(sys.getsizeof(term) for term in self.df)
+        vocabulary = len(self.df)
+        if self.base is not None:
+            # 快照部分是内存映射的只读页，按文件大小计，可被多个进程共享
+            nbytes += self.base.nbytes
+            vocabulary += len(self.base)
+        return {'documents': self.n_docs, 'vocabulary': vocabulary, 'bytes': nbytes}
+
+
+class HashedTfidf(IncrementalTfidf):
+    """哈希特征空间的增量TF-IDF：文档频率存放在固定长度的数组里
+
+    n-gram 用 crc32 映射到 n_features 个桶中的一个（跨进程稳定，可用于分片合并），
+    内存在创建时就确定，不随词表增长。冲突的 n-gram 共用一个计数，idf 会略偏低。
+    反查表只为关键词提取中得分最高的约 reverse_size 个桶保留可读的 n-gram 及其最近一次的
+    TF-IDF 得分（见 top_terms），文档频率降为 0 的桶随之丢弃。
+    """
+
+    def __init__(self, ngram_range=(1, 2), stop_words='english', n_features=2 ** 20, reverse_size=1000,
+                 tokenizer=None):
+        super().__init__(ngram_range=ngram_range, stop_words=stop_words, tokenizer=tokenizer)
+        self.n_features = n_features
+        self.reverse_size = reverse_size
+        self.df = np.zeros(n_features, dtype=np.int32)
+        # 桶号 -> (n-gram, 该 n-gram 最近一次被选为关键词时的得分)
+        self.names = {}
+
+    def bucket(self, term):
+        """n-gram 所在的桶；已经是桶号的整数原样返回"""
+        if isinstance(term, int):
+            return term
+        return zlib.crc32(term.encode('utf-8')) % self.n_features
+
+    def _count(self, tf):
+        """把按 n-gram 的词频换成按桶号的词频，并给出现的每个桶的文档频率加一
+
+        同一篇文档里冲突到同一个桶的 n-gram 只算一次，保证淘汰时能准确减回去。
+        """
+        bucket = self.bucket
+        hashed = Counter()
+        for term, count in tf.items():
+            hashed[bucket(term)] += count
+        df = self.df
+        for b in hashed:
+            df[b] += 1
+        return hashed
+
+    def top_keywords(self, text, k=5):
+        """返回文本中 TF-IDF 最高的 k 个词，并把它们记入反查表"""
+        scores = self.score(self.analyze(text))
+        top = heapq.nlargest(k, scores.items(), key=lambda item: (item[1], item[0]))
+        names = self.names
+        for term, score in top:
+            names[self.bucket(term)] = (term, score)
+        if len(names) > 2 * self.reverse_size:
+            # 只保留得分最高的 reverse_size 个桶的名字
+            keep = heapq.nlargest(self.reverse_size, names, key=lambda b: names[b][1])
+            self.names = {b: names[b] for b in keep}
+        return [term for term, _ in top]
+
+    def add_document(self, text):
+        """加入一篇文档，返回按桶号统计的词频（比字符串更省内存）"""
+        hashed = self._count(self.analyze(text))
+        self.n_docs += 1
+        return hashed
+
+    def add_terms(self, tfs):
+        hashed = [self._count(tf) for tf in tfs]
+        self.n_docs += len(tfs)
+        return hashed
+
+    def add_analyzed(self, tfs, df):
+        """加入在别处分好词的文档；按 n-gram 的 df 在哈希后不能直接相加，逐篇重新计数"""
+        hashed = [self._count(tf) for tf in tfs]
+        self.n_docs += len(tfs)
+        return hashed
+
+    def merge(self, df, n_docs):
+        """合并文档频率，键可以是 n-gram 或桶号
+
+        按桶号的 df（来自另一个同样宽度的 HashedTfidf）合并结果是精确的；
+        按 n-gram 的 df 在同一文档内有冲突时会多算。
+        """
+        for term, count in df.items():
+            self.df[self.bucket(term)] += count
+        self.n_docs += n_docs
+
+    def remove_document(self, tf):
+        df = self.df
+        for term in tf:
+            b = self.bucket(term)
+            df[b] -= 1
+            if not df[b]:
+                self.names.pop(b, None)
+        self.n_docs -= 1
+
+    def doc_freq(self, term):
+        return int(self.df[self.bucket(term)])
+
+    def document_frequencies(self):
+        """按桶号的文档频率（只含非零桶），可以与其他同样宽度的哈希状态合并"""
+        buckets = np.flatnonzero(self.df)
+        return Counter(dict(zip(buckets.tolist(), self.df[buckets].tolist())))
+
+    def top_terms(self, n=20):
+        """关键词提取中得分最高的可读 n-gram：[(n-gram, 得分, 含冲突的文档频率)]，跳过文档频率为 0 的桶"""
+        names = self.names
+        live = (b for b in names if self.df[b] > 0)
+        top = heapq.nlargest(n, live, key=lambda b: names[b][1])
+        return [(names[b][0], names[b][1], int(self.df[b])) for b in top]
+
+    def memory_usage(self):
+        nbytes = self.df.nbytes + sys.getsizeof(self.names) + sum(sys.getsizeof(term) for term, _ in self.names.values())
+        return {'documents': self.n_docs, 'vocabulary': int(np.count_nonzero(self.df)), 'bytes': nbytes}
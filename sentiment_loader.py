@@ -0,0 +1,14 @@
+# -*- coding: utf-8 -*-
+# 按路径加载情绪分析仪主程序 emotion study.py，HTTP 服务和性能测试共用
+import importlib.util
+import os
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+
+
+def load_analyzer_module():
+    """按路径加载 emotion study.py（文件名含空格，不能直接 import）"""
+    spec = importlib.util.spec_from_file_location('emotion_study', os.path.join(HERE, 'emotion study.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
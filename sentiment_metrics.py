@@ -0,0 +1,90 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的时间窗口统计：环形缓冲区按秒/分钟分桶，内存固定
+import math
+import time
+
+import numpy as np
+
+from sentiment_lexicon import CATEGORIES
+from sentiment_state import POLARITY_BINS, polarity_bin, polarity_bins
+
+_CATEGORY_INDEX = {name: i for i, name in enumerate(CATEGORIES)}
+
+
+class WindowedMetrics:
+    """最近一段时间的情感统计
+
+    resolution 为每个桶的时长（秒，如 1 或 60），buckets 为桶数，
+    最多能查询 resolution * buckets 秒内的数据。每个桶保存各类别计数、
+    极性总和和极性直方图；记录一条是 O(1)，查询是 O(桶数)，内存与流量无关。
+    """
+
+    def __init__(self, resolution=1.0, buckets=3600, clock=time.time):
+        self.resolution = resolution
+        self.buckets = buckets
+        self.clock = clock
+        # stamps[i] 为第 i 个槽当前存放的桶编号（时间 // resolution），-1 表示空
+        self.stamps = np.full(buckets, -1, dtype=np.int64)
+        self.counts = np.zeros((buckets, len(CATEGORIES)), dtype=np.int64)
+        self.sums = np.zeros(buckets, dtype=np.float64)
+        self.hist = np.zeros((buckets, POLARITY_BINS), dtype=np.int64)
+
+    def _slot(self, now):
+        """当前时间对应的槽，槽里是过期的桶时先清零"""
+        stamp = int(now // self.resolution)
+        slot = stamp % self.buckets
+        if self.stamps[slot] != stamp:
+            self.stamps[slot] = stamp
+            self.counts[slot] = 0
+            self.sums[slot] = 0.0
+            self.hist[slot] = 0
+        return slot
+
+    def record(self, sentiment, polarity, now=None):
+        """记录一条结果"""
+        slot = self._slot(self.clock() if now is None else now)
+        self.counts[slot, _CATEGORY_INDEX[sentiment]] += 1
+        self.sums[slot] += polarity
+        self.hist[slot, polarity_bin(polarity)] += 1
+
+    def record_many(self, counts, polarities, now=None):
+        """记录同一时刻的一批结果，counts 为按 CATEGORIES 顺序的各类别条数"""
+        slot = self._slot(self.clock() if now is None else now)
+        self.counts[slot] += counts
+        self.sums[slot] += float(np.sum(polarities))
+        self.hist[slot] += np.bincount(polarity_bins(polarities), minlength=POLARITY_BINS)
+
+    def query(self, window, now=None):
+        """最近 window 秒（含当前桶）的条数、各类别计数、平均极性和极性百分位数"""
+        now = self.clock() if now is None else now
+        current = int(now // self.resolution)
+        span = min(self.buckets, max(1, math.ceil(window / self.resolution)))
+        live = (self.stamps > current - span) & (self.stamps <= current)
+
+        counts = self.counts[live].sum(axis=0)
+        total = int(counts.sum())
+        hist = self.hist[live].sum(axis=0)
+        result = {'window': span * self.resolution, 'count': total}
+        result.update({name: int(counts[i]) for i, name in enumerate(CATEGORIES)})
+        result['mean_polarity'] = float(self.sums[live].sum()) / total if total else 0.0
+        for q in (50, 90, 99):
+            result[f'p{q}'] = _hist_percentile(hist, q)
+        return result
+
+    def memory_usage(self):
+        return self.stamps.nbytes + self.counts.nbytes + self.sums.nbytes + self.hist.nbytes
+
+
+def _hist_percentile(hist, q):
+    """由 [-1, 1] 上的等宽直方图估计第 q 百分位数（在桶内线性插值）"""
+    total = hist.sum()
+    if not total:
+        return 0.0
+    target = q / 100 * total
+    cumulative = np.cumsum(hist)
+    i = int(np.searchsorted(cumulative, target))
+    i = min(i, len(hist) - 1)
+    before = cumulative[i] - hist[i]
+    fraction = (target - before) / hist[i] if hist[i] else 0.0
+    width = 2.0 / len(hist)
+    return float(-1.0 + width * (i + fraction))
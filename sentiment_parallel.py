@@ -0,0 +1,66 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的多进程打分后端
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+from textblob.en.sentiments import PatternAnalyzer
+
+from sentiment_keywords import IncrementalTfidf
+from sentiment_tokens import Tokenizer
+
+# 每个工作进程自己的分析器，由 _init_worker 创建
+_worker = {}
+
+
+def _init_worker(ngram_range, stop_words, segmenter):
+    _worker['polarity'] = PatternAnalyzer()
+    # 每条文本在工作进程中只分一次词，不需要缓存
+    tokenizer = Tokenizer(ngram_range=ngram_range, stop_words=stop_words, maxsize=0, segmenter=segmenter)
+    _worker['tfidf'] = IncrementalTfidf(ngram_range=ngram_range, stop_words=stop_words, tokenizer=tokenizer)
+
+
+def _score_chunk(chunk):
+    """在工作进程中给一块文本打分，返回极性、每篇词频和这一块的文档频率
+
+    chunk 为 (文本列表, 已知极性列表)，已知极性为 None 的文本才需要打分。
+    """
+    texts, known = chunk
+    polarity = _worker['polarity']
+    tfidf = _worker['tfidf']
+    polarities = [polarity.analyze(text).polarity if value is None else value
+                  for text, value in zip(texts, known)]
+    tfs = [tfidf.analyze(text) for text in texts]
+    df = Counter(term for tf in tfs for term in tf)
+    return polarities, tfs, df
+
+
+class ParallelScorer:
+    """用进程池分块打分，结果按输入顺序合并，与串行结果完全一致"""
+
+    def __init__(self, processes=None, chunksize=500, ngram_range=(1, 2), stop_words='english', segmenter=None):
+        self.chunksize = chunksize
+        self.executor = ProcessPoolExecutor(max_workers=processes, initializer=_init_worker,
+                                            initargs=(ngram_range, stop_words, segmenter))
+
+    def score(self, texts, known=None):
+        """返回 (极性数组, 每篇词频列表, 合并后的文档频率)
+
+        known 可以给出已缓存的极性（未知的为 None），这些文本只做分词。
+        """
+        if known is None:
+            known = [None] * len(texts)
+        chunks = [(texts[i:i + self.chunksize], known[i:i + self.chunksize])
+                  for i in range(0, len(texts), self.chunksize)]
+        polarities = []
+        tfs = []
+        df = Counter()
+        # map 按提交顺序返回，保证合并后的顺序与输入一致
+        for chunk_polarities, chunk_tfs, chunk_df in self.executor.map(_score_chunk, chunks):
+            polarities.extend(chunk_polarities)
+            tfs.extend(chunk_tfs)
+            df.update(chunk_df)
+        return np.array(polarities, dtype=float), tfs, df
+
+    def close(self):
+        self.executor.shutdown()
@@ -0,0 +1,101 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的分阶段计时：每个阶段的调用次数、总/平均/最大耗时和处理条数
+import logging
+import time
+
+
+class StageStats:
+    """一个阶段的累计统计"""
+
+    __slots__ = ('calls', 'total', 'max', 'texts')
+
+    def __init__(self):
+        self.calls = 0
+        self.total = 0.0
+        self.max = 0.0
+        self.texts = 0
+
+    def to_dict(self):
+        return {
+            'calls': self.calls,
+            'total_s': self.total,
+            'avg_ms': self.total / self.calls * 1000 if self.calls else 0.0,
+            'max_ms': self.max * 1000,
+            'texts': self.texts,
+        }
+
+
+class Profiler:
+    """分阶段计时器，默认关闭
+
+    关闭时调用方只做一次 enabled 判断，不取时间、不记录，开销可以忽略。
+    hooks 中的每个函数在每次记录时以 (阶段名, 耗时秒数, 条数) 调用，可用于导出。
+    """
+
+    def __init__(self, enabled=False):
+        self.enabled = enabled
+        self.stages = {}
+        self.hooks = []
+        self.clock = time.perf_counter
+
+    def add_hook(self, hook):
+        self.hooks.append(hook)
+
+    def record(self, stage, start, texts=1):
+        """记录一次从 start（clock() 的返回值）到现在的耗时"""
+        elapsed = self.clock() - start
+        stats = self.stages.get(stage)
+        if stats is None:
+            stats = self.stages[stage] = StageStats()
+        stats.calls += 1
+        stats.total += elapsed
+        stats.texts += texts
+        if elapsed > stats.max:
+            stats.max = elapsed
+        for hook in self.hooks:
+            hook(stage, elapsed, texts)
+
+    def reset(self):
+        self.stages.clear()
+
+    def report(self):
+        return {stage: stats.to_dict() for stage, stats in self.stages.items()}
+
+
+class LogHook:
+    """把每次记录写到日志（默认 DEBUG 级别）"""
+
+    def __init__(self, logger=None, level=logging.DEBUG):
+        self.logger = logger or logging.getLogger('sentiment')
+        self.level = level
+
+    def __call__(self, stage, elapsed, texts):
+        self.logger.log(self.level, '%s %.3fms texts=%d', stage, elapsed * 1000, texts)
+
+
+def prometheus_text(stages, counters=None, prefix='sentiment'):
+    """生成 Prometheus 文本格式的指标
+
+    stages 为 Profiler.report() 的结果；counters 为 {指标名: {标签值: 数值}}，
+    标签名固定为 kind，例如 {'cache': {'hits': 10, 'misses': 2}}。
+    """
+    lines = []
+
+    def metric(name, kind, help_text, samples):
+        lines.append(f'# HELP {prefix}_{name} {help_text}')
+        lines.append(f'# TYPE {prefix}_{name} {kind}')
+        for labels, value in samples:
+            lines.append(f'{prefix}_{name}{{{labels}}} {value}')
+
+    def stage_samples(key):
+        return [(f'stage="{stage}"', stats[key]) for stage, stats in stages.items()]
+
+    metric('stage_calls_total', 'counter', 'Calls per pipeline stage.', stage_samples('calls'))
+    metric('stage_seconds_total', 'counter', 'Time spent per pipeline stage.', stage_samples('total_s'))
+    metric('stage_seconds_max', 'gauge', 'Slowest call per pipeline stage.',
+           [(f'stage="{stage}"', stats['max_ms'] / 1000) for stage, stats in stages.items()])
+    metric('stage_texts_total', 'counter', 'Texts processed per pipeline stage.', stage_samples('texts'))
+    for name, values in (counters or {}).items():
+        metric(f'{name}_total', 'counter', f'{name} counters.',
+               [(f'kind="{kind}"', value) for kind, value in values.items()])
+    return '\n'.join(lines) + '\n'
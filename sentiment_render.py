@@ -0,0 +1,142 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的图表渲染：复用同一张图，按条数/时间节流，可在后台线程写文件
+import math
+import os
+import threading
+import time
+
+LABELS = ['Positive', 'Negative', 'Neutral']
+COLORS = ['#66c2a5', '#fc8d62', '#8da0cb']
+
+
+class ChartRenderer:
+    """情感分布图（饼图+柱状图）的增量渲染器
+
+    every     每分析多少条文本重画一次（None 表示不按条数）
+    interval  距上次重画至少多少秒再画（None 表示不按时间）
+    background 为 True 时在后台线程画图并写文件，分析流程不必等待
+    图只创建一次，之后只更新扇形角度、文字和柱高；文件先写临时文件再替换。
+    """
+
+    def __init__(self, path='sentiment_analysis.png', every=1, interval=None, background=False):
+        self.path = path
+        self.every = every
+        self.interval = interval
+        self.background = background
+        self.pending = 0
+        self.last_render = 0.0
+        self.renders = 0
+        self.figure = None
+        self.lock = threading.Lock()
+        self.condition = threading.Condition()
+        self.queued = None
+        self.closing = False
+        self.thread = None
+
+    def update(self, history):
+        """每分析一条文本调用一次，到了重画条件时重画，返回是否重画"""
+        self.pending += 1
+        now = time.monotonic()
+        due = ((self.every is not None and self.pending >= self.every)
+               or (self.interval is not None and now - self.last_render >= self.interval))
+        if not due:
+            return False
+        self.pending = 0
+        self.last_render = now
+        if self.background:
+            self._submit(dict(history))
+        else:
+            self.render(history)
+        return True
+
+    def flush(self, history):
+        """把节流期间还没画出来的最新数据画出来"""
+        if not self.pending:
+            return
+        self.pending = 0
+        self.last_render = time.monotonic()
+        if self.background:
+            self._submit(dict(history))
+        else:
+            self.render(history)
+
+    def _submit(self, history):
+        """交给后台线程；线程还没来得及画的旧数据直接被新数据覆盖"""
+        with self.condition:
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, daemon=True)
+                self.thread.start()
+            self.queued = history
+            self.condition.notify()
+
+    def _run(self):
+        while True:
+            with self.condition:
+                while self.queued is None and not self.closing:
+                    self.condition.wait()
+                history, self.queued = self.queued, None
+                if history is None:
+                    return
+            self.render(history)
+
+    def _build(self):
+        """第一次画图时创建图和各个图形元素，之后只更新它们"""
+        # 不经过 pyplot，直接使用 Agg 画布，可以在后台线程中安全使用
+        from matplotlib.backends.backend_agg import FigureCanvasAgg
+        from matplotlib.figure import Figure
+
+        self.figure = Figure(figsize=(12, 5))
+        FigureCanvasAgg(self.figure)
+        self.ax_pie, self.ax_bar = self.figure.subplots(1, 2)
+
+        self.wedges, self.label_texts, self.pct_texts = self.ax_pie.pie(
+            [1, 1, 1], labels=LABELS, colors=COLORS, autopct='%1.1f%%', startangle=90)
+        self.ax_pie.axis('equal')
+        self.ax_pie.set_title('Sentiment Distribution')
+
+        self.bars = self.ax_bar.bar(LABELS, [0, 0, 0], color=COLORS)
+        self.ax_bar.set_title('Sentiment Count')
+        self.ax_bar.set_ylabel('Number of Texts')
+        self.figure.tight_layout()
+
+    def _update_artists(self, sizes):
+        total = sum(sizes)
+        angle = 90.0
+        for wedge, label, pct, size in zip(self.wedges, self.label_texts, self.pct_texts, sizes):
+            fraction = size / total if total else 0.0
+            wedge.set_theta1(angle)
+            angle += 360.0 * fraction
+            wedge.set_theta2(angle)
+            # 与 ax.pie 相同的文字位置：标签在半径1.1处，百分比在0.6处
+            middle = math.radians((wedge.theta1 + wedge.theta2) / 2)
+            x, y = math.cos(middle), math.sin(middle)
+            label.set_position((1.1 * x, 1.1 * y))
+            label.set_horizontalalignment('left' if x > 0 else 'right')
+            pct.set_position((0.6 * x, 0.6 * y))
+            pct.set_text(f'{100 * fraction:.1f}%')
+
+        for bar, size in zip(self.bars, sizes):
+            bar.set_height(size)
+        self.ax_bar.set_ylim(0, max(max(sizes) * 1.05, 1))
+
+    def render(self, history):
+        """立即重画并写文件"""
+        sizes = [history['positive'], history['negative'], history['neutral']]
+        with self.lock:
+            if self.figure is None:
+                self._build()
+            self._update_artists(sizes)
+            tmp_path = self.path + '.tmp'
+            self.figure.savefig(tmp_path, format='png')
+            os.replace(tmp_path, self.path)
+            self.renders += 1
+
+    def close(self):
+        """等后台线程画完最后一次后退出"""
+        with self.condition:
+            self.closing = True
+            self.condition.notify()
+        if self.thread is not None:
+            self.thread.join()
+            self.thread = None
+        self.closing = False
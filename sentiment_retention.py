@@ -0,0 +1,91 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的语料保留模块：限制历史文本占用的内存
+import sys
+import time
+from collections import deque
+
+
+class TextRetention:
+    """按策略保留最近的文本，超出限制时从最旧的开始淘汰
+
+    三种策略可以同时使用：
+      max_texts  最多保留的条数
+      max_age    时间窗口（秒），早于窗口的文本被淘汰
+      max_bytes  文本及其词频统计的字节预算
+    最新加入的一条总是保留，保证当前文本能参与关键词打分。
+    """
+
+    def __init__(self, max_texts=None, max_age=None, max_bytes=None, on_evict=None, clock=time.time):
+        self.max_texts = max_texts
+        self.max_age = max_age
+        self.max_bytes = max_bytes
+        # 淘汰回调：on_evict(text, payload)，用来同步删除依赖该文本的统计
+        self.on_evict = on_evict
+        self.clock = clock
+        self.entries = deque()
+        self.nbytes = 0
+        self.evicted = 0
+
+    def __len__(self):
+        return len(self.entries)
+
+    def __iter__(self):
+        return (entry[1] for entry in self.entries)
+
+    @staticmethod
+    def _sizeof(text, payload):
+        size = sys.getsizeof(text)
+        if payload is not None:
+            size += sys.getsizeof(payload)
+            if isinstance(payload, dict):
+                size += sum(sys.getsizeof(key) for key in payload)
+        return size
+
+    def add(self, text, payload=None):
+        """加入一条文本（payload 为附带的统计信息，淘汰时原样交给回调）"""
+        size = self._sizeof(text, payload)
+        self.entries.append((self.clock(), text, payload, size))
+        self.nbytes += size
+        self.expire()
+
+    def add_many(self, texts, payloads):
+        """批量加入文本，全部加入后再统一淘汰"""
+        now = self.clock()
+        for text, payload in zip(texts, payloads):
+            size = self._sizeof(text, payload)
+            self.entries.append((now, text, payload, size))
+            self.nbytes += size
+        self.expire()
+
+    def expire(self):
+        """按当前策略淘汰多余的旧文本，返回淘汰条数"""
+        count = 0
+        now = self.clock()
+        while len(self.entries) > 1 and self._over_limit(now):
+            self._pop_oldest()
+            count += 1
+        return count
+
+    def _over_limit(self, now):
+        if self.max_texts is not None and len(self.entries) > self.max_texts:
+            return True
+        if self.max_bytes is not None and self.nbytes > self.max_bytes:
+            return True
+        if self.max_age is not None and now - self.entries[0][0] > self.max_age:
+            return True
+        return False
+
+    def _pop_oldest(self):
+        _, text, payload, size = self.entries.popleft()
+        self.nbytes -= size
+        self.evicted += 1
+        if self.on_evict is not None:
+            self.on_evict(text, payload)
+
+    def clear(self):
+        while self.entries:
+            self._pop_oldest()
+
+    def memory_usage(self):
+        """当前保留的条数、字节数以及累计淘汰条数"""
+        return {'texts': len(self.entries), 'bytes': self.nbytes, 'evicted': self.evicted}
@@ -0,0 +1,162 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的中文分词：前缀词典上建 DAG，动态规划取概率最大的切分
+import marshal
+import math
+import os
+import re
+import sys
+
+# 中文字符（基本区和扩展 A 区）
+CJK_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]')
+# 含中文的文本按此切开：中文连续段、其他单词字符连续段
+CJK_WORD_RE = re.compile(r'[\u3400-\u4dbf\u4e00-\u9fff]+|[^\W\u3400-\u4dbf\u4e00-\u9fff]+')
+
+# 内置的常用词和情感词，没有给出词频的词按 DEFAULT_FREQ 计
+DEFAULT_WORDS = """
+    喜欢 开心 高兴 快乐 满意 优秀 精彩 完美 漂亮 舒服 推荐 感谢 谢谢 支持 幸福 温暖 惊喜 好看 好吃 好用
+    不错 很棒 给力 值得 点赞 厉害 方便 划算
+    讨厌 难过 伤心 糟糕 生气 愤怒 失望 垃圾 难看 难吃 难用 恶心 差劲 后悔 无聊 崩溃 郁闷 烦人 坑人 太差
+    不好 不行 骗子 投诉 退货 卡顿
+    我们 你们 他们 她们 它们 自己 大家 这个 那个 这些 那些 什么 怎么 为什么 因为 所以 但是 可是 如果
+    然后 已经 还是 就是 或者 而且 虽然 不过 只是 一个 一些 一下 一直 一起 没有 不是 可以 应该 需要
+    态度 今天 昨天 明天 现在 时候 时间 以后 之前 真的 非常 特别 比较 有点 感觉 觉得 知道 希望 发现 出来
+    手机 电脑 天气 交通 咖啡 价格 快递 相机 电影 音乐 专辑 应用 软件 服务 质量 体验 客服 产品 商家
+    朋友 工作 学习 生活 东西 问题 事情 地方 老师 同学 学校 公司 城市 国家 中国 世界 网络 视频 游戏
+"""
+DEFAULT_FREQ = 100
+
+# 关键词统计中去掉的中文停用词（单字词已经按长度去掉）
+CHINESE_STOP_WORDS = frozenset("""
+    我们 你们 他们 她们 它们 自己 大家 这个 那个 这些 那些 什么 怎么 因为 所以 但是 可是 如果 然后
+    已经 还是 就是 或者 而且 虽然 不过 只是 一个 一些 一下 一直 一起 可以 应该 真的 非常 特别 比较 有点
+""".split())
+
+class ChineseSegmenter:
+    """基于词典的中文分词器
+
+    词典是一个扁平的哈希表（词 -> 对数词频，词只保存一份并 intern），另记每个首字开头的最长词长。
+    从每个位置出发，只查不超过该首字最长词长的候选词，得到句子的有向无环图，
+    再从句尾往前动态规划取对数概率之和最大的路径。单字总可以成词（未登录的字按词频 1 计），
+    所以任何输入都能切开。不另存前缀表，内存约为同等词数的前缀词典的一半。
+    """
+
+    # 关键词统计时与英文停用词一起去掉
+    stop_words = CHINESE_STOP_WORDS
+
+    def __init__(self, words=None):
+        # 存对数词频，分词时不用再取对数
+        self.logfreq = {}
+        # 首字 -> 以它开头的最长（多字）词的长度
+        self.maxlen = {}
+        self.total = 0
+        if words is not None:
+            for word, freq in words.items():
+                self.add(word, freq)
+
+    @classmethod
+    def default(cls):
+        """只含内置常用词和情感词的分词器"""
+        return cls({word: DEFAULT_FREQ for word in DEFAULT_WORDS.split()})
+
+    def __len__(self):
+        return len(self.logfreq)
+
+    def __contains__(self, word):
+        return word in self.logfreq
+
+    def add(self, word, freq=DEFAULT_FREQ):
+        """加入或覆盖一个词"""
+        word = sys.intern(word)
+        old = self.logfreq.get(word)
+        if old is not None:
+            self.total -= round(math.exp(old))
+        self.total += freq
+        self.logfreq[word] = math.log(max(freq, 1))
+        if len(word) > 1 and len(word) > self.maxlen.get(word[0], 0):
+            self.maxlen[word[0]] = len(word)
+
+    def load(self, path, encoding='utf-8'):
+        """从文本词典加载词条（每行“词 [词频]”，# 开头的行忽略），返回条数"""
+        count = 0
+        with open(path, 'r', encoding=encoding) as file:
+            for line in file:
+                fields = line.split()
+                if not fields or fields[0].startswith('#'):
+                    continue
+                self.add(fields[0], int(fields[1]) if len(fields) > 1 else DEFAULT_FREQ)
+                count += 1
+        return count
+
+    def dump(self, path):
+        """把词典写成 marshal 文件，之后用 from_compiled 直接载入，不必再解析文本词典"""
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'wb') as file:
+            marshal.dump((self.logfreq, self.maxlen, self.total), file)
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def from_compiled(cls, path):
+        with open(path, 'rb') as file:
+            logfreq, maxlen, total = marshal.load(file)
+        segmenter = cls()
+        segmenter.logfreq = logfreq
+        segmenter.maxlen = maxlen
+        segmenter.total = total
+        return segmenter
+
+    def cut(self, sentence):
+        """把一段连续的中文切成词的列表"""
+        n = len(sentence)
+        if n < 2:
+            return [sentence] if n else []
+        get = self.logfreq.get
+        maxlen = self.maxlen
+        log_total = math.log(self.total or 1)
+        # best[i] 为从位置 i 到句尾的最大对数概率，ends[i] 为该路径上第一个词的结尾；
+        # 每个词的对数概率是 logfreq - log_total，这里把减去 log_total 放到每一步最后
+        best = [0.0] * (n + 1)
+        ends = [0] * n
+        i = n
+        for char in reversed(sentence):
+            i -= 1
+            score = get(char, 0.0) + best[i + 1]
+            end = i + 1
+            # 只有作为多字词首字的字才需要查候选词
+            if char in maxlen:
+                limit = i + maxlen[char]
+                if limit > n:
+                    limit = n
+                for j in range(i + 2, limit + 1):
+                    weight = get(sentence[i:j])
+                    if weight is not None:
+                        candidate = weight + best[j]
+                        if candidate > score:
+                            score = candidate
+                            end = j
+            best[i] = score - log_total
+            ends[i] = end
+
+        words = []
+        i = 0
+        while i < n:
+            end = ends[i]
+            words.append(sentence[i:end])
+            i = end
+        return words
+
+    def words(self, text):
+        """含中文的文本（已小写）切成单词：中文段分词，其他部分按 \\w+ 切"""
+        words = []
+        for part in CJK_WORD_RE.findall(text):
+            if CJK_RE.match(part):
+                words.extend(self.cut(part))
+            else:
+                words.append(part)
+        return words
+
+    def memory_usage(self):
+        """词典的条数和大致占用的字节数"""
+        logfreq = self.logfreq
+        nbytes = (sys.getsizeof(logfreq) + sys.getsizeof(self.maxlen)
+                  + sum(sys.getsizeof(word) + sys.getsizeof(weight) for word, weight in logfreq.items()))
+        return {'words': len(logfreq), 'bytes': nbytes}
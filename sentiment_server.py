@@ -0,0 +1,296 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的 asyncio HTTP 服务：并发请求合并成小批量一起打分
+# 用法: python sentiment_server.py serve --port 8765
+#       python sentiment_server.py load --port 8765 --concurrency 50 --requests 5000
+#       python sentiment_server.py bench      （在本机起服务并用内置压测程序测试）
+import argparse
+import asyncio
+import json
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+
+from sentiment_loader import load_analyzer_module
+
+
+def percentile(values, q):
+    """values 的第 q 百分位数（最近秩法），values 为空时返回 0"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, round(q / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+class MicroBatcher:
+    """把并发到达的文本攒成最多 max_batch 条、最多等待 max_delay 秒的小批量
+
+    队列有界（max_queue），满了以后 submit 会等待，从而把压力传回给连接。
+    打分在单独的线程中调用 analyze_many，不阻塞事件循环。
+    """
+
+    def __init__(self, analyzer, max_batch=64, max_delay=0.005, max_queue=1024):
+        self.analyzer = analyzer
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        # 单线程执行器：分析器不是线程安全的，同一时间只跑一批
+        self.executor = ThreadPoolExecutor(max_workers=1)
+        self.latencies = deque(maxlen=10000)
+        self.batches = 0
+        self.requests = 0
+        self.task = None
+
+    def start(self):
+        self.task = asyncio.get_running_loop().create_task(self._run())
+
+    async def submit(self, text):
+        """提交一条文本，返回 (情感类别, 极性分数)"""
+        future = asyncio.get_running_loop().create_future()
+        await self.queue.put((text, future, time.perf_counter()))
+        return await future
+
+    async def _collect(self):
+        """取出一批请求：先等到第一条，再在截止时间内尽量凑满"""
+        loop = asyncio.get_running_loop()
+        batch = [await self.queue.get()]
+        deadline = loop.time() + self.max_delay
+        while len(batch) < self.max_batch:
+            if not self.queue.empty():
+                batch.append(self.queue.get_nowait())
+                continue
+            timeout = deadline - loop.time()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(await asyncio.wait_for(self.queue.get(), timeout))
+            except asyncio.TimeoutError:
+                break
+        return batch
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = await self._collect()
+            texts = [text for text, _, _ in batch]
+            try:
+                sentiments, polarities = await loop.run_in_executor(self.executor, self.analyzer.analyze_many, texts)
+                results = list(zip(sentiments, polarities))
+            except Exception as e:
+                if len(batch) == 1:
+                    results = [e]
+                else:
+                    # 整批失败时逐条重新打分，只让出错的那条请求失败
+                    results = [await self._score_one(loop, text) for text in texts]
+
+            now = time.perf_counter()
+            for (_, future, start), result in zip(batch, results):
+                if future.done():
+                    continue
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    sentiment, polarity = result
+                    future.set_result((str(sentiment), float(polarity)))
+                    self.latencies.append(now - start)
+            self.batches += 1
+            self.requests += len(batch)
+
+    async def _score_one(self, loop, text):
+        """单独给一条文本打分，返回 (情感类别, 极性分数) 或打分时的异常"""
+        try:
+            sentiments, polarities = await loop.run_in_executor(self.executor, self.analyzer.analyze_many, [text])
+        except Exception as e:
+            return e
+        return sentiments[0], polarities[0]
+
+    def stats(self):
+        latencies = list(self.latencies)
+        return {
+            'requests': self.requests,
+            'batches': self.batches,
+            'mean_batch': self.requests / self.batches if self.batches else 0.0,
+            'queued': self.queue.qsize(),
+            'p50_ms': percentile(latencies, 50) * 1000,
+            'p99_ms': percentile(latencies, 99) * 1000,
+            'history': dict(self.analyzer.history),
+        }
+
+    async def close(self):
+        if self.task is not None:
+            self.task.cancel()
+            try:
+                await self.task
+            except asyncio.CancelledError:
+                pass
+        self.executor.shutdown()
+
+
+class SentimentServer:
+    """极简的 HTTP/1.1 服务（支持 keep-alive）
+
+    POST /analyze  请求体 {"text": "..."}，返回 {"sentiment": ..., "polarity": ...}
+    GET  /stats    返回批量大小、排队数、p50/p99 延迟和情感统计
+    """
+
+    def __init__(self, batcher, host='127.0.0.1', port=8765):
+        self.batcher = batcher
+        self.host = host
+        self.port = port
+        self.server = None
+
+    async def start(self):
+        self.batcher.start()
+        self.server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = self.server.sockets[0].getsockname()[1]
+
+    async def close(self):
+        self.server.close()
+        await self.server.wait_closed()
+        await self.batcher.close()
+
+    async def _handle(self, reader, writer):
+        try:
+            while True:
+                request_line = await reader.readline()
+                if not request_line:
+                    break
+                method, path = request_line.decode('latin-1').split()[:2]
+                headers = {}
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b'\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    headers[name.strip().lower()] = value.strip()
+                body = await reader.readexactly(int(headers.get('content-length', 0)))
+
+                status, result = await self._route(method, path, body)
+                payload = json.dumps(result, ensure_ascii=False).encode('utf-8')
+                writer.write(f'HTTP/1.1 {status}\r\nContent-Type: application/json; charset=utf-8\r\n'
+                             f'Content-Length: {len(payload)}\r\n\r\n'.encode('latin-1') + payload)
+                await writer.drain()
+                if headers.get('connection', '').lower() == 'close':
+                    break
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        finally:
+            writer.close()
+
+    async def _route(self, method, path, body):
+        if method == 'POST' and path == '/analyze':
+            try:
+                text = json.loads(body)['text']
+            except (ValueError, KeyError, TypeError):
+                text = None
+            if not isinstance(text, str):
+                return '400 Bad Request', {'error': '请求体应为 {"text": "..."}'}
+            try:
+                sentiment, polarity = await self.batcher.submit(text)
+            except Exception as e:
+                return '500 Internal Server Error', {'error': f'{type(e).__name__}: {e}'}
+            return '200 OK', {'sentiment': sentiment, 'polarity': polarity}
+        if method == 'GET' and path == '/stats':
+            return '200 OK', self.batcher.stats()
+        return '404 Not Found', {'error': f'{method} {path}'}
+
+
+async def run_load(host, port, concurrency, requests, texts):
+    """压测程序：concurrency 个长连接并发发送共 requests 个请求，返回客户端统计"""
+    latencies = []
+    counter = iter(range(requests))
+
+    async def client():
+        reader, writer = await asyncio.open_connection(host, port)
+        try:
+            for i in counter:
+                body = json.dumps({'text': texts[i % len(texts)]}).encode('utf-8')
+                start = time.perf_counter()
+                writer.write(f'POST /analyze HTTP/1.1\r\nHost: {host}\r\nContent-Type: application/json\r\n'
+                             f'Content-Length: {len(body)}\r\n\r\n'.encode('latin-1') + body)
+                await writer.drain()
+                await reader.readline()
+                length = 0
+                while True:
+                    line = await reader.readline()
+                    if line in (b'\r\n', b''):
+                        break
+                    name, _, value = line.decode('latin-1').partition(':')
+                    if name.lower() == 'content-length':
+                        length = int(value)
+                await reader.readexactly(length)
+                latencies.append(time.perf_counter() - start)
+        finally:
+            writer.close()
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {
+        'requests': len(latencies),
+        'seconds': elapsed,
+        'rps': len(latencies) / elapsed,
+        'p50_ms': percentile(latencies, 50) * 1000,
+        'p99_ms': percentile(latencies, 99) * 1000,
+    }
+
+
+def make_server(args):
+    module = load_analyzer_module()
+    analyzer = module.SentimentAnalyzer(engine=args.engine)
+    # 预先导入打分依赖，避免第一批请求承担导入耗时
+    if args.engine == 'textblob':
+        analyzer.polarity_analyzer
+    batcher = MicroBatcher(analyzer, max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000,
+                           max_queue=args.max_queue)
+    return SentimentServer(batcher, host=args.host, port=args.port)
+
+
+async def serve(args):
+    server = make_server(args)
+    await server.start()
+    print(f'listening on http://{server.host}:{server.port}')
+    async with server.server:
+        await server.server.serve_forever()
+
+
+async def bench(args):
+    """在本机起服务，跑内置压测，打印客户端和服务端统计"""
+    from sentiment_bench import make_corpus
+
+    args.port = 0
+    server = make_server(args)
+    await server.start()
+    try:
+        client = await run_load(server.host, server.port, args.concurrency, args.requests, make_corpus(1000))
+        print('client', json.dumps(client))
+        print('server', json.dumps(server.batcher.stats(), ensure_ascii=False))
+    finally:
+        await server.close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description='情绪分析仪 HTTP 服务')
+    parser.add_argument('command', choices=['serve', 'load', 'bench'])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--engine', choices=['textblob', 'lexicon'], default='textblob')
+    parser.add_argument('--max-batch', type=int, default=64, help='每批最多多少条文本')
+    parser.add_argument('--max-delay-ms', type=float, default=5.0, help='凑批最多等待的毫秒数')
+    parser.add_argument('--max-queue', type=int, default=1024, help='排队请求的上限')
+    parser.add_argument('--concurrency', type=int, default=50, help='压测的并发连接数')
+    parser.add_argument('--requests', type=int, default=5000, help='压测的请求总数')
+    args = parser.parse_args()
+
+    if args.command == 'serve':
+        asyncio.run(serve(args))
+    elif args.command == 'load':
+        from sentiment_bench import make_corpus
+        result = asyncio.run(run_load(args.host, args.port, args.concurrency, args.requests, make_corpus(1000)))
+        print(json.dumps(result))
+    else:
+        asyncio.run(bench(args))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,232 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的二进制快照：保存/恢复全部状态，恢复时内存映射文件
+#
+# 文件格式（小端）：
+#   8 字节魔数 b'SENTSNP1' | 8 字节头部长度 | JSON 头部 | 对齐到 8 字节的各个数组段
+# 头部记录计数、直方图、保留策略计数以及每个段的 (偏移, dtype, 长度)。
+# 词表按 UTF-8 字节序排好后拼成一整块，只存一份，文档里的词用词号引用：
+#   vocab_offsets/vocab_blob  词表      df            每个词的文档频率
+#   text_offsets/text_blob    保留的文本  timestamps    加入时间
+#   doc_indptr/doc_terms/doc_counts  每篇保留文本的词频（CSR 形式）
+import json
+import mmap
+import os
+import struct
+from collections import Counter, deque
+
+import numpy as np
+
+from sentiment_keywords import HashedTfidf
+
+MAGIC = b'SENTSNP1'
+
+
+def _align(offset):
+    return (offset + 7) & ~7
+
+
+def _offsets(chunks):
+    offsets = np.zeros(len(chunks) + 1, dtype=np.uint64)
+    np.cumsum([len(chunk) for chunk in chunks], out=offsets[1:])
+    return offsets
+
+
+def _count_dtype(values):
+    """能装下这些计数的最小无符号整数类型"""
+    return np.uint32 if not len(values) or max(values) < 2 ** 32 else np.uint64
+
+
+def write_snapshot(analyzer, path):
+    """把分析器的统计、词表和保留的文本写入快照文件"""
+    if isinstance(analyzer.tfidf, HashedTfidf):
+        raise ValueError('哈希特征空间没有完整词表，不支持快照，请使用 get_state()')
+    # 覆盖正在映射的文件在 Windows 上会失败，在其他系统上也会让映射的页面失效
+    mapped = getattr(analyzer, 'mapped_snapshot', None)
+    if mapped is not None and os.path.exists(path) and os.path.samefile(path, mapped.path):
+        raise ValueError(f'{path} 是当前正在映射的快照，请写到新的路径，或先调用 release_snapshot()')
+    df = analyzer.tfidf.document_frequencies()
+    # UTF-8 编码保持码点顺序，按字符串排序即按字节排序，恢复时可以二分查找
+    vocabulary = sorted(df)
+    ids = {term: i for i, term in enumerate(vocabulary)}
+    encoded_terms = [term.encode('utf-8') for term in vocabulary]
+    counts = [df[term] for term in vocabulary]
+
+    entries = list(analyzer.corpus.entries)
+    encoded_texts = [text.encode('utf-8') for _, text, _, _ in entries]
+    doc_items = [list(tf.items()) for _, _, tf, _ in entries]
+    doc_counts = [count for items in doc_items for _, count in items]
+
+    sections = {
+        'vocab_offsets': _offsets(encoded_terms),
+        'vocab_blob': np.frombuffer(b''.join(encoded_terms), dtype=np.uint8),
+        'df': np.array(counts, dtype=_count_dtype(counts)),
+        'text_offsets': _offsets(encoded_texts),
+        'text_blob': np.frombuffer(b''.join(encoded_texts), dtype=np.uint8),
+        'timestamps': np.array([entry[0] for entry in entries], dtype=np.float64),
+        'doc_indptr': _offsets(doc_items),
+        'doc_terms': np.array([ids[term] for items in doc_items for term, _ in items], dtype=np.uint32),
+        'doc_counts': np.array(doc_counts, dtype=_count_dtype(doc_counts)),
+    }
+
+    layout = {}
+    offset = 0
+    for name, array in sections.items():
+        layout[name] = [offset, array.dtype.str, len(array)]
+        offset = _align(offset + array.nbytes)
+    header = json.dumps({
+        'n_docs': analyzer.tfidf.n_docs,
+        'history': analyzer.history,
+        'polarity_hist': analyzer.polarity_hist.tolist(),
+        'evicted': analyzer.corpus.evicted,
+        'sections': layout,
+    }).encode('utf-8')
+
+    data_start = _align(16 + len(header))
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as file:
+        file.write(MAGIC + struct.pack('<Q', len(header)) + header)
+        for name, array in sections.items():
+            file.seek(data_start + layout[name][0])
+            file.write(array.tobytes())
+        file.truncate(data_start + offset)
+    os.replace(tmp_path, path)
+
+
+class MappedVocabulary:
+    """内存映射的只读词表：按字节序二分查找词的文档频率"""
+
+    def __init__(self, offsets, blob, df):
+        self.offsets = offsets
+        self.blob = blob
+        self.df = df
+        self.nbytes = offsets.nbytes + blob.nbytes + df.nbytes
+
+    def __len__(self):
+        return len(self.df)
+
+    def term(self, i):
+        return bytes(self.blob[int(self.offsets[i]):int(self.offsets[i + 1])]).decode('utf-8')
+
+    def find(self, term):
+        """返回词号，不存在时返回 -1"""
+        key = term.encode('utf-8')
+        offsets = self.offsets
+        blob = self.blob
+        lo, hi = 0, len(self.df)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if bytes(blob[int(offsets[mid]):int(offsets[mid + 1])]) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < len(self.df) and bytes(blob[int(offsets[lo]):int(offsets[lo + 1])]) == key:
+            return lo
+        return -1
+
+    def get(self, term):
+        i = self.find(term)
+        return int(self.df[i]) if i >= 0 else 0
+
+    def items(self):
+        for i in range(len(self.df)):
+            yield self.term(i), int(self.df[i])
+
+
+class SnapshotDocument:
+    """快照中一篇保留文本的词频，只在被淘汰时才解码"""
+
+    def __init__(self, snapshot, index):
+        self.snapshot = snapshot
+        self.index = index
+
+    def items(self):
+        snapshot = self.snapshot
+        start, end = int(snapshot.doc_indptr[self.index]), int(snapshot.doc_indptr[self.index + 1])
+        for term_id, count in zip(snapshot.doc_terms[start:end], snapshot.doc_counts[start:end]):
+            yield snapshot.vocabulary.term(int(term_id)), int(count)
+
+    def __iter__(self):
+        return (term for term, _ in self.items())
+
+
+class Snapshot:
+    """以只读方式内存映射的快照文件，多个进程可共享同一份物理页
+
+    用完后调用 close()（或用 with）解除映射；解除前必须不再有对象引用映射中的数组。
+    """
+
+    def __init__(self, path):
+        self.path = path
+        with open(path, 'rb') as file:
+            self.mm = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        if self.mm[:8] != MAGIC:
+            raise ValueError(f'{path} 不是情绪分析仪的快照文件')
+        (header_length,) = struct.unpack('<Q', self.mm[8:16])
+        self.header = json.loads(self.mm[16:16 + header_length])
+        data_start = _align(16 + header_length)
+        for name, (offset, dtype, length) in self.header['sections'].items():
+            setattr(self, name, np.frombuffer(self.mm, dtype=np.dtype(dtype), count=length,
+                                              offset=data_start + offset))
+        self.vocabulary = MappedVocabulary(self.vocab_offsets, self.vocab_blob, self.df)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def close(self):
+        """丢掉各个数组段并解除映射，可重复调用"""
+        if self.mm is None:
+            return
+        for name in self.header['sections']:
+            delattr(self, name)
+        self.vocabulary = None
+        self.mm.close()
+        self.mm = None
+
+    def texts(self):
+        blob = self.text_blob
+        offsets = self.text_offsets
+        for i in range(len(self.timestamps)):
+            yield bytes(blob[int(offsets[i]):int(offsets[i + 1])]).decode('utf-8')
+
+
+def load_snapshot(analyzer, path):
+    """把快照恢复到一个新建的分析器中，词表和文档频率直接使用映射的页面"""
+    if isinstance(analyzer.tfidf, HashedTfidf):
+        raise ValueError('快照只能恢复到使用完整词表的分析器')
+    snapshot = Snapshot(path)
+    header = snapshot.header
+    analyzer.history = dict(header['history'])
+    analyzer.polarity_hist = np.array(header['polarity_hist'], dtype=np.int64)
+    analyzer.tfidf.base = snapshot.vocabulary
+    analyzer.tfidf.n_docs = header['n_docs']
+
+    corpus = analyzer.corpus
+    for i, text in enumerate(snapshot.texts()):
+        size = corpus._sizeof(text, None)
+        corpus.entries.append((float(snapshot.timestamps[i]), text, SnapshotDocument(snapshot, i), size))
+        corpus.nbytes += size
+    corpus.evicted = header['evicted']
+    # 新的保留策略可能比快照时更严格
+    corpus.expire()
+    return snapshot
+
+
+def release_snapshot(analyzer):
+    """把恢复时映射的词表和保留文本的词频复制到内存中，然后关闭快照文件
+
+    之后分析器不再依赖快照文件，可以删除或覆盖它。
+    """
+    snapshot = analyzer.mapped_snapshot
+    if snapshot is None:
+        return
+    analyzer.tfidf.df = analyzer.tfidf.document_frequencies()
+    analyzer.tfidf.base = None
+    corpus = analyzer.corpus
+    corpus.entries = deque(
+        (timestamp, text, Counter(dict(payload.items())) if isinstance(payload, SnapshotDocument) else payload, size)
+        for timestamp, text, payload, size in corpus.entries)
+    analyzer.mapped_snapshot = None
+    snapshot.close()
@@ -0,0 +1,76 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的可合并状态：多个分片各自分析，最后合并成全局统计
+import json
+from collections import Counter
+
+import numpy as np
+
+# 极性直方图：[-1, 1] 均分为 POLARITY_BINS 个区间
+POLARITY_BINS = 20
+
+
+def polarity_bin(polarity):
+    """单个极性分数所在的直方图区间编号（与 polarity_bins 一致）"""
+    return min(max(int((polarity + 1) * (POLARITY_BINS / 2)), 0), POLARITY_BINS - 1)
+
+
+def polarity_bins(polarities):
+    """把极性分数映射到直方图的区间编号"""
+    bins = ((np.asarray(polarities, dtype=float) + 1) * (POLARITY_BINS / 2)).astype(int)
+    return np.clip(bins, 0, POLARITY_BINS - 1)
+
+
+class AnalyzerState:
+    """分析器的统计状态：情感计数、文档频率（其键即词表）、文档数、极性直方图
+
+    merge 满足结合律和交换律，分片按任意顺序合并都得到同样的结果。
+    若分片在分析过程中按保留策略淘汰过文本，合并得到的是各分片保留窗口的并集。
+    """
+
+    def __init__(self, history=None, df=None, n_docs=0, polarity_hist=None):
+        self.history = dict(history or {'positive': 0, 'negative': 0, 'neutral': 0})
+        self.df = Counter(df or {})
+        self.n_docs = n_docs
+        if polarity_hist is None:
+            polarity_hist = np.zeros(POLARITY_BINS, dtype=np.int64)
+        self.polarity_hist = np.asarray(polarity_hist, dtype=np.int64).copy()
+
+    def __eq__(self, other):
+        return (isinstance(other, AnalyzerState) and self.history == other.history and self.df == other.df
+                and self.n_docs == other.n_docs and np.array_equal(self.polarity_hist, other.polarity_hist))
+
+    def merge(self, other):
+        """返回两个状态合并后的新状态"""
+        history = {key: self.history.get(key, 0) + other.history.get(key, 0)
+                   for key in self.history.keys() | other.history.keys()}
+        df = self.df + other.df
+        return AnalyzerState(history, df, self.n_docs + other.n_docs, self.polarity_hist + other.polarity_hist)
+
+    @classmethod
+    def merge_all(cls, states):
+        merged = cls()
+        for state in states:
+            merged = merged.merge(state)
+        return merged
+
+    def to_dict(self):
+        vocabulary = sorted(self.df)
+        return {
+            'history': self.history,
+            'n_docs': self.n_docs,
+            'vocabulary': vocabulary,
+            'df': [self.df[term] for term in vocabulary],
+            'polarity_hist': self.polarity_hist.tolist(),
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['history'], dict(zip(data['vocabulary'], data['df'])), data['n_docs'],
+                   data['polarity_hist'])
+
+    def dumps(self):
+        return json.dumps(self.to_dict(), ensure_ascii=False)
+
+    @classmethod
+    def loads(cls, text):
+        return cls.from_dict(json.loads(text))
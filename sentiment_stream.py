@@ -0,0 +1,87 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的流式处理：逐行读取大文件或标准输入，分块分析，逐条写出结果
+import csv
+import itertools
+import json
+
+CSV_FIELDS = ['line', 'id', 'sentiment', 'polarity', 'keywords']
+
+
+def read_records(file, fmt='text', field='text'):
+    """逐行产生 (行号, 记录id, 文本)，不会把整个文件读进内存
+
+    fmt 为 'text' 时每行一条文本；为 'jsonl' 时每行一个 JSON 对象，
+    文本取 field 字段，有 'id' 字段时一并带出（也可以是一个 JSON 字符串）。
+    空行被跳过；不是合法 JSON 或没有字符串文本的行抛出带行号的 ValueError。
+    """
+    for number, line in enumerate(file, 1):
+        line = line.rstrip('\r\n')
+        if not line.strip():
+            continue
+        if fmt == 'jsonl':
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                raise ValueError(f'第 {number} 行不是合法的 JSON: {e}') from None
+            if isinstance(record, str):
+                yield number, None, record
+            elif isinstance(record, dict) and isinstance(record.get(field), str):
+                yield number, record.get('id'), record[field]
+            else:
+                raise ValueError(f'第 {number} 行应为 JSON 字符串或 {field} 字段为字符串的 JSON 对象')
+        else:
+            yield number, None, line
+
+
+def chunked(iterable, size):
+    """把可迭代对象切成每块 size 个元素的列表"""
+    if size < 1:
+        raise ValueError(f'块大小应为正整数: {size}')
+    iterator = iter(iterable)
+    while True:
+        chunk = list(itertools.islice(iterator, size))
+        if not chunk:
+            return
+        yield chunk
+
+
+class ResultWriter:
+    """把每条结果写成 JSONL 或 CSV"""
+
+    def __init__(self, out, fmt='jsonl', keywords=False):
+        self.out = out
+        self.fmt = fmt
+        self.keywords = keywords
+        if fmt == 'csv':
+            fields = CSV_FIELDS if keywords else CSV_FIELDS[:-1]
+            self.writer = csv.DictWriter(out, fieldnames=fields)
+            self.writer.writeheader()
+
+    def write(self, line, record_id, sentiment, polarity, keywords=None):
+        result = {'line': line, 'id': record_id, 'sentiment': sentiment, 'polarity': round(polarity, 4)}
+        if self.fmt == 'csv':
+            if self.keywords:
+                result['keywords'] = ' '.join(word for words in keywords.values() for word in words)
+            self.writer.writerow(result)
+        else:
+            if record_id is None:
+                del result['id']
+            if self.keywords:
+                result['keywords'] = dict(keywords)
+            self.out.write(json.dumps(result, ensure_ascii=False) + '\n')
+
+
+def stream_analyze(analyzer, records, writer, chunksize=1000):
+    """分块调用 analyze_many，逐条写出结果，返回处理的条数
+
+    内存占用只与块大小和分析器的保留策略有关，与输入文件大小无关。
+    """
+    count = 0
+    for chunk in chunked(records, chunksize):
+        texts = [text for _, _, text in chunk]
+        sentiments, polarities = analyzer.analyze_many(texts)
+        for (line, record_id, text), sentiment, polarity in zip(chunk, sentiments, polarities):
+            keywords = analyzer.extract_keywords(text) if writer.keywords else None
+            writer.write(line, record_id, str(sentiment), float(polarity), keywords)
+        count += len(chunk)
+    return count
@@ -0,0 +1,113 @@
+# -*- coding: utf-8 -*-
+# 情绪分析仪的分词：每条文本只扫描一次，词流供打分、词典匹配和关键词统计共用
+import re
+from collections import Counter, OrderedDict
+
+from sentiment_segment import CJK_RE
+
+_WORD_RE = re.compile(r'\w+')
+_findall = _WORD_RE.findall
+_join = ' '.join
+_search_cjk = CJK_RE.search
+
+# 与 sklearn 的 ENGLISH_STOP_WORDS 相同，直接写在这里，免去导入 sklearn 的启动耗时
+ENGLISH_STOP_WORDS = frozenset("""
+    a about above across after afterwards again against all almost alone along already also
+    although always am among amongst amoungst amount an and another any anyhow anyone anything
+    anyway anywhere are around as at back be became because become becomes becoming been before
+    beforehand behind being below beside besides between beyond bill both bottom but by call can
+    cannot cant co con could couldnt cry de describe detail do done down due during each eg
+    eight either eleven else elsewhere empty enough etc even ever every everyone everything
+    everywhere except few fifteen fifty fill find fire first five for former formerly forty
+    found four from front full further get give go had has hasnt have he hence her here
+    hereafter hereby herein hereupon hers herself him himself his how however hundred i ie if in
+    inc indeed interest into is it its itself keep last latter latterly least less ltd made many
+    may me meanwhile might mill mine more moreover most mostly move much must my myself name
+    namely neither never nevertheless next nine no nobody none noone nor not nothing now nowhere
+    of off often on once one only onto or other others otherwise our ours ourselves out over own
+    part per perhaps please put rather re same see seem seemed seeming seems serious several she
+    should show side since sincere six sixty so some somehow someone something sometime
+    sometimes somewhere still such system take ten than that the their them themselves then
+    thence there thereafter thereby therefore therein thereupon these they thick thin third this
+    those though three through throughout thru thus to together too top toward towards twelve
+    twenty two un under until up upon us very via was we well were what whatever when whence
+    whenever where whereafter whereas whereby wherein whereupon wherever whether which while
+    whither who whoever whole whom whose why will with within without would yet you your yours
+    yourself yourselves
+""".split())
+
+
+def words(text):
+    """小写后的全部单词（\\w+），供情感词典匹配"""
+    return _findall(text.lower())
+
+
+class TokenStream:
+    """一条文本的分词结果
+
+    words 为小写后的全部单词；terms 为关键词统计用的 n-gram 词频，
+    规则与 TfidfVectorizer 默认的分词一致（至少两个字符、去停用词、按 ngram_range 组合）。
+    """
+
+    __slots__ = ('words', 'terms')
+
+    def __init__(self, words, terms):
+        self.words = words
+        self.terms = terms
+
+
+class Tokenizer:
+    """预编译正则的分词器，最近 maxsize 条文本的结果按原文缓存
+
+    同一条文本先后经过打分、关键词统计和关键词提取时只分词一次。
+    给出 segmenter（如 ChineseSegmenter）时，含中文的文本交给它切词，
+    其停用词也一并去掉；不含中文的文本只多一次正则查找。
+    """
+
+    def __init__(self, ngram_range=(1, 2), stop_words='english', maxsize=4096, segmenter=None):
+        self.ngram_range = ngram_range
+        if stop_words == 'english':
+            stop_words = ENGLISH_STOP_WORDS
+        self.stop_words = frozenset(stop_words or ())
+        if segmenter is not None and stop_words:
+            self.stop_words |= segmenter.stop_words
+        self.segmenter = segmenter
+        self.maxsize = maxsize
+        self.cache = OrderedDict()
+
+    def __call__(self, text):
+        stream = self.cache.get(text)
+        if stream is not None:
+            self.cache.move_to_end(text)
+            return stream
+        stream = self.tokenize(text)
+        if self.maxsize:
+            self.cache[text] = stream
+            if len(self.cache) > self.maxsize:
+                self.cache.popitem(last=False)
+        return stream
+
+    def tokenize(self, text):
+        """不经过缓存分词：一次正则扫描得到全部单词，n-gram 由单词列表组合"""
+        text = text.lower()
+        if self.segmenter is not None and _search_cjk(text):
+            all_words = self.segmenter.words(text)
+        else:
+            all_words = _findall(text)
+        stop_words = self.stop_words
+        tokens = [word for word in all_words if len(word) > 1 and word not in stop_words]
+        return TokenStream(all_words, Counter(self.ngrams(tokens)))
+
+    def ngrams(self, tokens):
+        """按 ngram_range 组合 n-gram，顺序与 sklearn 的 _word_ngrams 相同"""
+        min_n, max_n = self.ngram_range
+        if max_n == 1:
+            return tokens
+        grams = tokens if min_n == 1 else []
+        for n in range(max(min_n, 2), min(max_n, len(tokens)) + 1):
+            # zip 错位的若干份词列表得到连续 n 个词，比逐个切片快
+            grams = grams + list(map(_join, zip(*[tokens[i:] for i in range(n)])))
+        return grams
+
+    def clear(self):
+        self.cache.clear()
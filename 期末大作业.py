@@ -5,16 +5,16 @@ import tkinter
 import tkinter.messagebox
 # 导入tkinter的filedialog模块，用于打开文件选择对话框（让用户选择本地文件）
 import tkinter.filedialog
-# 导入time模块，用于控制程序休眠时间（实现名单滚动延迟效果）
-import time
-# 导入random模块，用于生成随机数（打乱学生名单顺序，实现随机抽取）
-import random
-# 导入threading模块，用于创建多线程（避免名单滚动时界面卡顿）
-import threading
-# 导入itertools模块，用于创建迭代工具（这里用cycle实现名单循环迭代）
-import itertools
 # 导入os模块，用于操作系统相关操作（这里获取上传文件的文件名）
 import os
+# 导入roster模块，用于分块读取名单文件并紧凑地保存名单（与final.py共用）
+import roster
+# 导入roster_draw模块，用于从名单中随机抽取名字（每次抽取不复制、不打乱整份名单）
+import roster_draw
+# 导入roster_anim模块，用于在界面线程中用定时器逐帧滚动名单（不另开线程、不休眠）
+import roster_anim
+# 导入roster_view模块，用于打开查看名单的窗口（只显示看得到的几行，支持按开头的字查找）
+import roster_view
 
 # 创建主窗口对象，tkinter程序的核心容器
 root = tkinter.Tk()
@@ -28,10 +28,11 @@ root.resizable(False, False)
 
 # 定义关闭窗口时执行的函数：停止名单滚动并销毁窗口
 def closeWindow():
-    # 设置控制滚动的标志为False，终止滚动循环
-    root.flag = False
-    # 休眠0.1秒，确保滚动线程有时间响应停止信号
-    time.sleep(0.1)
+    # 取消已经排好的下一帧，名单滚动立即停止
+    ticker.stop()
+    # 如果还在后台读取名单文件，通知读取线程停止
+    if loader is not None:
+        loader.cancel()
     # 彻底销毁主窗口，结束程序运行
     root.destroy()
 
@@ -41,12 +42,20 @@ root.protocol('WM_DELETE_WINDOW', closeWindow)
 
 # 定义默认学生名单（程序初始自带的名单数据）
 default_students = ['张三', '李四', '王五', '赵六', '周七', '钱八']
-# 当前使用的学生名单（初始复制默认名单，后续可通过上传替换）
-students = default_students.copy()
-# 定义滚动控制标志（True=滚动中，False=停止滚动），绑定在root对象上方便全局访问
-root.flag = False
+# 当前使用的学生名单（由默认名单建立紧凑名单，后续可通过上传替换）
+students = roster.Roster(default_students)
+# 从当前名单中抽取名字的抽取器（更换名单时重新创建）
+drawer = roster_draw.Drawer(students)
+# "不重复"复选框的变量（True=所有人都被抽到之前不重复）
+no_repeat = tkinter.BooleanVar(root, value=False)
+# "加权"复选框的变量（True=回答次数越少越容易被抽到，缺席的人不再被抽到）
+weighted = tkinter.BooleanVar(root, value=False)
 # 记录当前名单的来源（默认名单/上传的文件名），用于状态显示
 current_list_source = "默认名单"
+# 正在后台读取名单文件的读取器（没有在读取时为None）
+loader = None
+# 查看名单的窗口（没有打开时为None）
+viewer = None
 
 
 # 定义上传自定义名单的函数（让用户选择本地txt文件作为名单）
@@ -63,74 +72,86 @@ def upload_custom_list():
     if not filepath:
         return
 
-    # 尝试读取并解析选中的文件（捕获可能出现的错误，如文件损坏、编码问题）
-    try:
-        # 以只读模式打开文件，指定编码为utf-8（避免中文乱码）
-        with open(filepath, 'r', encoding='utf-8') as file:
-            # 读取文件所有行，存入lines列表
-            lines = file.readlines()
-
-        # 初始化新名单列表，用于存储解析后的学生姓名
-        new_students = []
-        # 遍历文件的每一行，提取姓名
-        for line in lines:
-            # 去除行首尾的空白字符（空格、换行符、制表符等）
-            line = line.strip()
-            # 如果处理后是空行，跳过不处理
-            if not line:
-                continue
-
-            # 尝试用多种分隔符分割行内容（适配不同用户的输入习惯）
-            for separator in [',', '，', ';', '；', ' ', '\t']:
-                # 如果当前行包含该分隔符
-                if separator in line:
-                    # 按分隔符分割行，去除每个姓名的空白字符，过滤空字符串
-                    names = [name.strip() for name in line.split(separator) if name.strip()]
-                    # 将分割后的姓名添加到新名单
-                    new_students.extend(names)
-                    # 跳出分隔符循环，处理下一行
-                    break
-            else:
-                # 如果该行没有任何分隔符，整行作为一个姓名添加到新名单
-                new_students.append(line)
+    # 全局变量声明（修改函数外部的loader）
+    global loader
+    # 在后台线程中分块读取名单文件（大文件也不会让窗口卡住）
+    loader = roster.RosterLoader(filepath).start()
+    # 读取期间禁用"上传名单"、"开始"和"恢复默认"按钮
+    btnUpload['state'] = 'disabled'
+    btnStart['state'] = 'disabled'
+    btnRestore['state'] = 'disabled'
+    # 50毫秒后在主线程中查看读取进度
+    root.after(50, check_loader, filepath)
 
-        # 如果解析后新名单为空，弹出警告提示
-        if not new_students:
-            tkinter.messagebox.showwarning('警告', '文件中没有找到有效的名字！')
-            return
 
-        # 全局变量声明（修改函数外部的students和current_list_source）
-        global students, current_list_source
-        # 更新当前使用的学生名单为解析后的新名单
-        students = new_students
-        # 更新名单来源为选中文件的文件名（仅保留文件名，去掉路径）
-        current_list_source = os.path.basename(filepath)
+# 定义查看读取进度的函数（在主线程中定时运行，读完后更新名单）
+def check_loader(filepath):
+    # 全局变量声明（修改函数外部的loader、students、drawer和current_list_source）
+    global loader, students, drawer, current_list_source
+    # 没有正在进行的读取时直接返回
+    if loader is None:
+        return
+    # 还没读完：在状态标签中显示进度，50毫秒后再查看
+    if not loader.done:
+        lbl_status['text'] = f'正在加载 {loader.fraction:.0%}，已读 {loader.count} 人'
+        # 读取期间状态标签文字为灰色
+        lbl_status['fg'] = 'gray'
+        root.after(50, check_loader, filepath)
+        return
+
+    # 读取结束，取出结果并清除读取器
+    result = loader
+    loader = None
+    # 恢复"上传名单"、"开始"和"恢复默认"按钮
+    btnUpload['state'] = 'normal'
+    btnStart['state'] = 'normal'
+    btnRestore['state'] = 'normal'
 
-        # 更新状态标签的显示内容（告知用户已加载的名单）
-        lbl_status['text'] = f'已加载: {current_list_source}'
-        # 设置状态标签文字颜色为蓝色
-        lbl_status['fg'] = 'blue'
+    # 读取出错或没有读到名字：状态标签恢复为原来的名单，并弹出提示
+    if result.error is not None or not result.roster:
+        if current_list_source == '默认名单':
+            lbl_status['text'] = '使用默认名单'
+            lbl_status['fg'] = 'black'
+        else:
+            lbl_status['text'] = f'已加载: {current_list_source}'
+            lbl_status['fg'] = 'blue'
+        # 读取文件时出错（如文件不存在、权限不足、编码错误等），弹出错误对话框
+        if result.error is not None:
+            tkinter.messagebox.showerror('错误', f'读取文件时出错:\n{str(result.error)}')
+        # 文件中没有名字，弹出警告提示
+        else:
+            tkinter.messagebox.showwarning('警告', '文件中没有找到有效的名字！')
+        return
 
-        # 构建加载成功的提示信息
-        message = f'成功加载 {len(students)} 个名字:\n' + ', '.join(students[:10])
-        # 如果名单超过10人，省略后续名字并显示总人数
-        if len(students) > 10:
-            message += f'...等共{len(students)}人'
-        # 弹出信息对话框，展示加载结果
-        tkinter.messagebox.showinfo('名单加载成功', message)
+    # 更新当前使用的学生名单为读取到的新名单
+    students = result.roster
+    # 为新名单创建抽取器（沿用当前的"不重复"和"加权"设置）
+    drawer = roster_draw.Drawer(students, no_repeat=no_repeat.get(), weighted=weighted.get())
+    # 更新名单来源为选中文件的文件名（仅保留文件名，去掉路径）
+    current_list_source = os.path.basename(filepath)
 
-    # 捕获读取文件时的所有异常（如文件不存在、权限不足、编码错误等）
-    except Exception as e:
-        # 弹出错误对话框，显示具体错误信息
-        tkinter.messagebox.showerror('错误', f'读取文件时出错:\n{str(e)}')
+    # 更新状态标签的显示内容（告知用户已加载的名单）
+    lbl_status['text'] = f'已加载: {current_list_source}'
+    # 设置状态标签文字颜色为蓝色
+    lbl_status['fg'] = 'blue'
+
+    # 构建加载成功的提示信息
+    message = f'成功加载 {len(students)} 个名字:\n' + ', '.join(students[:10])
+    # 如果名单超过10人，省略后续名字并显示总人数
+    if len(students) > 10:
+        message += f'...等共{len(students)}人'
+    # 弹出信息对话框，展示加载结果
+    tkinter.messagebox.showinfo('名单加载成功', message)
 
 
 # 定义恢复默认名单的函数（将当前名单重置为初始默认名单）
 def restore_default_list():
-    # 全局变量声明（修改函数外部的students和current_list_source）
-    global students, current_list_source
-    # 重新复制默认名单到当前名单（避免直接赋值导致关联修改）
-    students = default_students.copy()
+    # 全局变量声明（修改函数外部的students、drawer和current_list_source）
+    global students, drawer, current_list_source
+    # 由默认名单重新建立当前名单（避免直接赋值导致关联修改）
+    students = roster.Roster(default_students)
+    # 为默认名单创建抽取器（沿用当前的"不重复"和"加权"设置）
+    drawer = roster_draw.Drawer(students, no_repeat=no_repeat.get(), weighted=weighted.get())
     # 更新名单来源为"默认名单"
     current_list_source = "默认名单"
     # 更新状态标签显示
@@ -143,37 +164,30 @@ def restore_default_list():
 
 # 定义显示当前名单的函数（展示当前使用的名单详情）
 def show_current_list():
-    # 构建当前名单信息：先显示名单来源
-    message = f'当前名单来源: {current_list_source}\n\n'
-    # 显示名单中的总人数
-    message += f'名单中共有 {len(students)} 人:\n\n'
-    # 格式化名单显示，每行最多显示5个名字
-    for i in range(0, len(students), 5):
-        # 截取当前行的5个名字，用两个空格分隔，添加换行符
-        message += '  '.join(students[i:i + 5]) + '\n'
-    # 弹出信息对话框，展示完整名单
-    tkinter.messagebox.showinfo('当前名单', message)
-
-
-# 定义名单滚动显示的核心函数（在子线程中运行，避免阻塞界面）
+    # 全局变量声明（修改函数外部的viewer）
+    global viewer
+    # 查看名单的窗口已经打开
+    if viewer is not None and viewer.exists():
+        # 窗口显示的就是当前名单：直接把窗口显示到最前面
+        if viewer.names is students:
+            viewer.lift()
+            return
+        # 名单已经更换：关掉旧窗口
+        viewer.top.destroy()
+    # 打开查看名单的窗口（只显示看得到的几行，名单再长也能立即打开）
+    viewer = roster_view.RosterWindow(root, students, current_list_source)
+
+
+# 定义名单滚动一帧的函数（由定时器在界面线程中反复调用，形成滚动动画）
 def switch():
-    # 设置滚动标志为True，启动滚动
-    root.flag = True
-    # 复制当前学生名单（避免打乱原始名单）
-    t = students.copy()
-    # 随机打乱复制后的名单顺序
-    random.shuffle(t)
-    # 创建循环迭代器（名单滚动到末尾后自动从头开始）
-    t = itertools.cycle(t)
-
-    # 循环滚动：只要滚动标志为True，就持续更新显示
-    while root.flag:
-        # 滚动动画逻辑：将下一个名字依次传递给三个Label
-        lb1['text'] = lb2['text']  # 第一个Label显示第二个Label之前的内容
-        lb2['text'] = lb3['text']  # 第二个Label显示第三个Label之前的内容
-        lb3['text'] = next(t)  # 第三个Label显示迭代器的下一个名字
-        # 控制滚动速度：休眠0.1秒（数值越小滚动越快，越大越慢）
-        time.sleep(0.1)
+    # 滚动动画逻辑：将下一个名字依次传递给三个Label
+    lb1['text'] = lb2['text']  # 第一个Label显示第二个Label之前的内容
+    lb2['text'] = lb3['text']  # 第二个Label显示第三个Label之前的内容
+    lb3['text'] = drawer.pick()  # 第三个Label显示随机取出的一个名字（不复制、不打乱名单）
+
+
+# 创建滚动定时器：每100毫秒调用一次switch（数值越小滚动越快，越大越慢）
+ticker = roster_anim.Ticker(root, 100, switch)
 
 
 # 定义"开始"按钮的点击事件处理函数
@@ -183,10 +197,8 @@ def btnStartClick():
         tkinter.messagebox.showwarning('警告', '当前名单为空，请先上传名单！')
         return
 
-    # 创建子线程，执行switch函数（名单滚动）
-    t = threading.Thread(target=switch)
-    # 启动子线程
-    t.start()
+    # 启动滚动定时器，开始逐帧滚动名单
+    ticker.start()
 
     # 更新按钮状态：禁用"开始"、启用"停止"、禁用"上传名单"和"恢复默认"
     btnStart['state'] = 'disabled'
@@ -195,16 +207,46 @@ def btnStartClick():
     btnRestore['state'] = 'disabled'
 
 
+# 定义"不重复"复选框的点击事件处理函数
+def toggle_no_repeat():
+    # 按复选框的状态切换抽取器的模式
+    drawer.no_repeat = no_repeat.get()
+    # 重新开始一轮，所有人都可以再被抽到
+    drawer.reset()
+
+
+# 定义"加权"复选框的点击事件处理函数
+def toggle_weighted():
+    # 按复选框的状态切换抽取器的加权模式
+    drawer.weighted = weighted.get()
+    # 加权模式下"不重复"不起作用，禁用该复选框；取消加权后重新启用
+    chkNoRepeat['state'] = 'disabled' if weighted.get() else 'normal'
+
+
 # 定义"停止"按钮的点击事件处理函数
 def btnStopClick():
-    # 设置滚动标志为False，停止滚动
-    root.flag = False
-    # 休眠0.3秒，确保滚动线程完全停止，避免显示异常
-    time.sleep(0.3)
+    # 取消已经排好的下一帧，滚动立即停止（此后switch不会再被调用，不必休眠等待）
+    ticker.stop()
 
     # 确保名单不为空时，弹出中奖提示
     if students:
-        tkinter.messagebox.showinfo('恭喜', f'本次中奖: {lb2["text"]}\n\n(来自: {current_list_source})')
+        # 由抽取器决定中奖者，显示在红色Label中（不重复模式下本轮已抽到的人不会再中）
+        try:
+            lb2['text'] = drawer.draw()
+        # 加权模式下所有人都已记为缺席时没有人可抽，弹出警告
+        except IndexError:
+            tkinter.messagebox.showwarning('警告', '名单中的人都已记为缺席，请取消加权或重新加载名单！')
+        else:
+            # 加权模式：询问中奖者是否到场回答，并记录结果
+            if drawer.weighted:
+                # 弹出是/否对话框（"是"=到场回答，"否"=缺席）
+                present = tkinter.messagebox.askyesno(
+                    '恭喜', f'本次中奖: {lb2["text"]}\n\n(来自: {current_list_source})\n\n到场回答了吗？选"否"记为缺席')
+                # 到场回答则回答次数加一、以后被抽到的机会变小；缺席则以后不再被抽到
+                drawer.record(drawer.last, present)
+            # 普通模式：弹出信息对话框，展示中奖者
+            else:
+                tkinter.messagebox.showinfo('恭喜', f'本次中奖: {lb2["text"]}\n\n(来自: {current_list_source})')
 
     # 恢复按钮状态：启用"开始"、禁用"停止"、启用"上传名单"和"恢复默认"
     btnStart['state'] = 'normal'
@@ -232,7 +274,15 @@ btnRestore.place(x=20, y=40, width=80, height=25)
 
 # 创建"查看名单"按钮：绑定show_current_list函数，设置位置和大小
 btnShow = tkinter.Button(root, text='查看名单', command=show_current_list)
-btnShow.place(x=110, y=40, width=130, height=25)
+btnShow.place(x=110, y=40, width=60, height=25)
+
+# 创建"不重复"复选框：勾选后所有人都被抽到之前不会重复中奖
+chkNoRepeat = tkinter.Checkbutton(root, text='不重复', variable=no_repeat, command=toggle_no_repeat)
+chkNoRepeat.place(x=180, y=40, width=70, height=25)
+
+# 创建"加权"复选框：勾选后回答次数越少越容易被抽到，缺席的人不再被抽到（放在红色Label右侧）
+chkWeighted = tkinter.Checkbutton(root, text='加权', variable=weighted, command=toggle_weighted)
+chkWeighted.place(x=205, y=133, width=60, height=25)
 
 # 创建状态标签：显示当前名单来源，设置位置和大小
 lbl_status = tkinter.Label(root, text='使用默认名单')